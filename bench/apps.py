@@ -0,0 +1,305 @@
+# Headless load test for the Streamlit apps. N simulated sessions drive each app
+# through AppTest (no browser, no network) against a synthetic registry and gate
+# log; per-rerun latency percentiles, peak RSS and file I/O are reported per app.
+#   python -m bench.apps [--apps test2.py Test4.py veh5.py] [--sessions 4] [--entries 5]
+#                        [--registry-rows 20000] [--log-days 30] [--log-per-day 400]
+#                        [--json results.json] [--compare baseline.json]
+#
+# Every app runs in its own process (one process = one Streamlit server), started
+# from a fresh copy of the same synthetic data, so numbers from two commits can be
+# compared with --compare. AppTest is not thread-safe, so the sessions take turns
+# rerun by rerun inside that process, sharing its caches and log like real sessions.
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUARD_APPS = ("test2.py", "Test4.py")
+
+
+# ===== Synthetic data =====
+def write_registry(path, rows, seed=0):
+    from bench.normalize import synthetic_registry
+
+    plates, flats = synthetic_registry(rows, seed)
+    import pandas as pd
+
+    pd.DataFrame({"Vehicle": plates, "FlatNumber": flats}).to_csv(path, index=False)
+
+
+def write_logs(folder, days, per_day):
+    # a registry must already be in the current directory
+    import gate_log
+    from bench.reports import synthetic_year
+
+    gate_log.log_folder = os.path.join(folder, "vehicle_logs")
+    os.makedirs(gate_log.log_folder, exist_ok=True)
+    if days:
+        _, rows = synthetic_year(per_day, days=days)
+        for gate, gate_rows in rows.items():
+            gate_log._write_records(gate, gate_rows)
+            gate_log.rotate(gate)
+
+
+def make_data(folder, registry_rows, log_days, log_per_day):
+    os.makedirs(folder, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        write_registry("vehicle_flat_pairs.csv", registry_rows)
+        write_logs(folder, log_days, log_per_day)
+        for name in ("vehicle_flat_pairs_clean.csv", "vehicle_flat_pairs_clean.csv.sha256"):
+            if os.path.exists(name):
+                os.remove(name)   # every app run starts cold
+    finally:
+        os.chdir(cwd)
+
+
+# ===== Measurements =====
+def proc_io():
+    # this process's I/O counters (Linux); {} elsewhere
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in (line.split(":") for line in f)}
+    except OSError:
+        return {}
+
+
+def percentiles(seconds):
+    ms = np.array(seconds) * 1000
+    return {"count": len(ms), "mean": float(ms.mean()), "p50": float(np.percentile(ms, 50)),
+            "p95": float(np.percentile(ms, 95)), "p99": float(np.percentile(ms, 99)), "max": float(ms.max())}
+
+
+class Timings:
+    def __init__(self):
+        self.steps = {}
+
+    def run(self, step, at_or_widget):
+        # one rerun, timed; returns the AppTest
+        started = time.perf_counter()
+        at = at_or_widget.run()
+        self.steps.setdefault(step, []).append(time.perf_counter() - started)
+        if at.exception:
+            error = at.exception[0].proto
+            if error.type in ("ModuleNotFoundError", "ImportError"):
+                raise ImportError(error.message)   # optional dependency of the app not installed
+            raise RuntimeError(f"{step}: {error.type}: {error.message}")
+        return at
+
+
+def app_users():
+    # the users dict and guard list the guard apps share
+    from gate_app import users, guard_users
+
+    return users, guard_users
+
+
+def button(at, prefix):
+    return next(b for b in at.button if b.label.startswith(prefix))
+
+
+# ===== Session scripts =====
+# Each is a generator yielding after every rerun, so sessions can take turns.
+def guard_session(at, timings, name, password, plates, entries):
+    at.selectbox[0].set_value(name)
+    at.text_input[0].input(password)
+    at = timings.run("login", at.button[0].click())
+    yield
+    for i in range(entries):
+        next(r for r in at.radio if r.label == "Select Action").set_value("IN" if i % 2 == 0 else "OUT")
+        next(t for t in at.text_input if t.label == "Enter Vehicle Number").input(plates[i % len(plates)])
+        at = timings.run("submit", button(at, "Submit Entry").click())
+        yield
+    at = timings.run("show_logs", button(at, "📖").click())
+    yield
+    older = button(at, "⬅️") if any(b.label.startswith("⬅️") for b in at.button) else None
+    if older is not None and not older.disabled:
+        at = timings.run("older_page", older.click())
+        yield
+    timings.run("summary", button(at, "📊").click())
+    yield
+
+
+def supervisor_session(at, timings, name, password):
+    at.selectbox[0].set_value(name)
+    at.text_input[0].input(password)
+    at = timings.run("supervisor_login", at.button[0].click())
+    yield
+    timings.run("reports", button(at, "📈").click())
+    yield
+
+
+def lookup_session(at, timings, plates, flats):
+    field = lambda: next(t for t in at.text_input if t.key == "vehicle_flat_input")
+    for step, query in (("lookup_vehicle", plates[0]), ("lookup_flat", flats[0]), ("lookup_partial", plates[1][-4:])):
+        field().input(query)
+        timings.run(step, at.button[0].click())
+        yield
+
+
+def run_app(app, sessions, entries, supervisors):
+    # runs inside the data folder; returns the result dict for one app
+    from streamlit.testing.v1 import AppTest
+    import pandas as pd
+    from registry import normalize_vehicle_input, normalize_flat_input
+
+    raw = pd.read_csv("vehicle_flat_pairs.csv")
+    plates = [p for p in map(normalize_vehicle_input, raw.iloc[:, 0]) if p][:max(entries, 2) * 4]
+    flats = [f for f in map(normalize_flat_input, raw.iloc[:, 1]) if f][:4]
+
+    timings = Timings()
+    io_before = proc_io()
+    started = time.perf_counter()
+    scripts = []
+    for n in range(sessions + (supervisors if app in GUARD_APPS else 0)):
+        at = timings.run("first_run", AppTest.from_file(os.path.join(REPO, app), default_timeout=120))
+        if app not in GUARD_APPS:
+            scripts.append(lookup_session(at, timings, plates[n:] + plates[:n], flats))
+            continue
+        users, guards = app_users()
+        guard_names = [u for u in users if u in guards]
+        supervisor_names = [u for u in users if u not in guards]
+        if n < sessions:
+            name = guard_names[n % len(guard_names)]
+            scripts.append(guard_session(at, timings, name, users[name], plates[n::sessions] or plates, entries))
+        else:
+            name = supervisor_names[(n - sessions) % len(supervisor_names)]
+            scripts.append(supervisor_session(at, timings, name, users[name]))
+    # round-robin: one rerun per session per turn
+    while scripts:
+        for script in list(scripts):
+            try:
+                next(script)
+            except StopIteration:
+                scripts.remove(script)
+    wall = time.perf_counter() - started
+    io_after = proc_io()
+
+    reruns = sum(len(seconds) for seconds in timings.steps.values())
+    return {
+        "steps": {step: percentiles(seconds) for step, seconds in timings.steps.items()},
+        "reruns": reruns,
+        "wall_s": wall,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "io": {key: io_after[key] - io_before.get(key, 0) for key in io_after},
+    }
+
+
+def worker(app, folder, sessions, entries, supervisors):
+    os.chdir(folder)
+    sys.path.insert(0, REPO)
+    os.environ.setdefault("WHISPER_SOCKET", os.path.join(folder, "whisper.sock"))
+    try:
+        result = run_app(app, sessions, entries, supervisors)
+    except ImportError as e:
+        result = {"skipped": f"{type(e).__name__}: {e}"}
+    print(json.dumps(result))
+
+
+# ===== Reporting =====
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def print_results(results):
+    for app, result in results["apps"].items():
+        if "skipped" in result:
+            print(f"{app}: skipped ({result['skipped']})")
+            continue
+        io = result["io"]
+        print(f"{app}: {result['reruns']} reruns in {result['wall_s']:.1f}s, peak RSS {result['peak_rss_mb']:.0f} MB, "
+              f"{io.get('syscr', 0)} reads / {io.get('syscw', 0)} writes, {io.get('wchar', 0) / 1024:.0f} KB written")
+        print(f"  {'step':<18}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for step, stats in result["steps"].items():
+            print(f"  {step:<18}{stats['count']:>5}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+
+
+def compare(results, baseline, threshold):
+    # p95 per step against a saved run; returns the regressions
+    regressions = []
+    print(f"Compared with {baseline.get('commit')} (p95, +{threshold:.0%} counts as slower):")
+    if baseline.get("config") != results["config"]:
+        print(f"  note: different settings, baseline ran with {baseline.get('config')}")
+    for app, result in results["apps"].items():
+        base = baseline.get("apps", {}).get(app, {})
+        for step, stats in result.get("steps", {}).items():
+            if step not in base.get("steps", {}):
+                continue
+            before, after = base["steps"][step]["p95"], stats["p95"]
+            change = (after - before) / before if before else 0.0
+            flag = "  SLOWER" if change > threshold else ""
+            print(f"  {app:<10}{step:<18}{before:>9.1f} -> {after:>9.1f} ms ({change:+.0%}){flag}")
+            if flag:
+                regressions.append((app, step))
+        for key in ("peak_rss_mb",):
+            if key in base and key in result:
+                print(f"  {app:<10}{key:<18}{base[key]:>9.0f} -> {result[key]:>9.0f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test for the Streamlit apps")
+    parser.add_argument("--apps", nargs="+", default=["test2.py", "Test4.py", "veh5.py"])
+    parser.add_argument("--sessions", type=int, default=4, help="simulated guard sessions per app")
+    parser.add_argument("--supervisors", type=int, default=1, help="extra supervisor sessions building reports")
+    parser.add_argument("--entries", type=int, default=5, help="entries submitted per guard session")
+    parser.add_argument("--registry-rows", type=int, default=20000)
+    parser.add_argument("--log-days", type=int, default=30, help="days of existing gate log")
+    parser.add_argument("--log-per-day", type=int, default=400, help="entries per gate per day in the existing log")
+    parser.add_argument("--json", help="save results here")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 slowdown that counts as a regression")
+    parser.add_argument("--worker", nargs=2, metavar=("APP", "FOLDER"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.sessions, args.entries, args.supervisors)
+        return
+
+    sys.path.insert(0, REPO)
+    data = tempfile.mkdtemp(prefix="bench-apps-")
+    print(f"Generating {args.registry_rows} registry rows and {args.log_days} days x {args.log_per_day} entries x 2 gates ...")
+    make_data(os.path.join(data, "template"), args.registry_rows, args.log_days, args.log_per_day)
+
+    results = {"commit": git_commit(), "time": time.strftime("%Y-%m-%d %H:%M:%S"), "config": {
+        key: getattr(args, key) for key in ("sessions", "supervisors", "entries", "registry_rows", "log_days", "log_per_day")
+    }, "apps": {}}
+    for app in args.apps:
+        folder = os.path.join(data, app.replace(".", "_"))
+        shutil.copytree(os.path.join(data, "template"), folder)
+        command = [sys.executable, "-m", "bench.apps", "--worker", app, folder, "--sessions", str(args.sessions),
+                   "--entries", str(args.entries), "--supervisors", str(args.supervisors)]
+        done = subprocess.run(command, cwd=REPO, capture_output=True, text=True)
+        lines = done.stdout.strip().splitlines()
+        try:
+            results["apps"][app] = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            results["apps"][app] = {"skipped": f"failed: {done.stderr.strip().splitlines()[-1:] or done.returncode}"}
+    shutil.rmtree(data, ignore_errors=True)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} step(s) slower than {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Entries with five guards on duty: the old one-record-per-guard submit against one
+# record per vehicle, for single vehicles and for a convoy submitted at once.
+#   python -m bench.batch_entry [vehicles]     (default: 200)
+import os
+import sys
+import time
+import tempfile
+
+import gate_log
+
+GUARDS = ["Naveen Kumar", "Rajeev Padwal", "Suresh Sagare", "Sandeep Karekar", "Manoj"]
+CONVOY = 20
+
+
+def run(label, submits):
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-batch-")
+    writer = gate_log.get_writer()
+    entries, batches = writer.entries, writer.batches
+    started = time.perf_counter()
+    for rows in submits:
+        gate_log.append_records(1, rows)
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(gate_log.get_log_file(1))
+    print(f"  {label:<36}{seconds * 1000:>9.1f} ms{writer.entries - entries:>9}{writer.batches - batches:>9}"
+          f"{size / 1024:>9.1f} KB{sum(gate_log.summarize(1)['Car'].values()):>9}")
+
+
+def main(vehicles=200):
+    plates = [f"MH12AB{i:04d}" for i in range(vehicles)]
+    print(f"{vehicles} vehicles, {len(GUARDS)} guards on duty")
+    print(f"  {'':<36}{'time':>12}{'records':>9}{'writes':>9}{'log':>12}{'counted':>9}")
+    run("one record per guard (before)", [[(guard, "Car", plate, "F803", "IN") for guard in GUARDS] for plate in plates])
+    user = gate_log.join_guards(GUARDS)
+    run("one record, guards attached", [[(user, "Car", plate, "F803", "IN")] for plate in plates])
+    run(f"convoys of {CONVOY}, one write each", [[(user, "Car", plate, "F803", "IN") for plate in plates[i:i + CONVOY]]
+                                                 for i in range(0, vehicles, CONVOY)])
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
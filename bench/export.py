@@ -0,0 +1,93 @@
+# Bulk export of a synthetic year of two-gate traffic: times each format and measures
+# its peak memory, then checks every file against a row-by-row CSV of the merged
+# timeline, and a filtered timeline export against the filtered merge.
+#   python -m bench.export [events_per_gate_per_day]     (default: 400)
+import io
+import os
+import csv
+import sys
+import time
+import tempfile
+from datetime import datetime
+import tracemalloc
+
+import pandas as pd
+
+import export
+import gate_log
+import timeline
+from bench.reports import synthetic_year
+
+GATES = (1, 2)
+
+
+def measure(label, fn):
+    # timed without tracing (tracemalloc slows everything down), then run again for the peak
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    print(f"  {label:<40}{seconds:>8.2f} s{peak:>9.1f} MB")
+    return result
+
+
+def timeline_rows_csv(spec):
+    # the reference: every LogRecord of the merged timeline, written one row at a time
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(export.COLUMNS)
+    for r in timeline.iter_timeline(spec, GATES):
+        when = datetime.fromtimestamp(r.ts, gate_log.IST)
+        writer.writerow([when.strftime("%d-%m-%Y"), when.strftime("%H:%M:%S"), r.gate, r.action, r.number, r.flat,
+                         r.vehicle_type, r.user, r.entry_no])
+    return out.getvalue()
+
+
+def main(events_per_day=400):
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-export-")
+    first_day, rows = synthetic_year(events_per_day, gates=GATES)
+    last_day = gate_log.today()
+    for gate, gate_rows in rows.items():
+        gate_log._write_records(gate, gate_rows)
+        gate_log.rotate(gate)
+    total = sum(len(gate_rows) for gate_rows in rows.values())
+    folder = tempfile.mkdtemp(prefix="bench-export-")
+    paths = {fmt: os.path.join(folder, f"year.{extension}") for fmt, (extension, _, _) in export.FORMATS.items()}
+    run = {fmt: (lambda fmt=fmt: export.export_logs(paths[fmt], fmt, GATES, first_day, last_day)) for fmt in export.available_formats()}
+
+    print(f"{total:,} entries over {len(GATES)} gates and a year")
+    print(f"  {'':<40}{'time':>10}{'peak':>12}   (peak: Python allocations)")
+    spec = timeline.make_filter(first_day, last_day)
+    reference = measure("merged timeline, row by row into a string", lambda: timeline_rows_csv(spec))
+    for fmt, fn in run.items():
+        assert measure(f"export {fmt}", fn) == total
+        print(f"    {os.path.getsize(paths[fmt]) / 2**20:.1f} MB file")
+
+    # every format holds exactly the rows of the merged timeline, in its order
+    with open(paths["CSV"], encoding="utf-8", newline="") as f:
+        assert f.read() == reference
+    expected = pd.read_csv(io.StringIO(reference), dtype=str, keep_default_na=False)
+    if "Parquet" in run:
+        assert pd.read_parquet(paths["Parquet"]).astype(str).equals(expected)
+    import openpyxl
+    workbook = openpyxl.load_workbook(paths["Excel"], read_only=True)
+    cells = [row for sheet in workbook.worksheets for row in list(sheet.iter_rows(values_only=True))[1:]]
+    sheets = workbook.sheetnames
+    workbook.close()
+    assert pd.DataFrame(cells, columns=export.COLUMNS).astype(str).equals(expected)
+    print(f"\n{', '.join(run)} match the timeline CSV; Excel has {len(sheets)} monthly sheets: {', '.join(sheets)}")
+
+    # the timeline panel's export: its filters applied chunk by chunk
+    filtered = timeline.make_filter(first_day, last_day, plate="12")
+    path = os.path.join(folder, "timeline.csv")
+    rows = measure("timeline export, plate contains 12", lambda: export.export_logs(path, "CSV", GATES, first_day, last_day, filtered))
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == timeline_rows_csv(filtered)
+    print(f"filtered timeline export matches the filtered merge ({rows:,} entries)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
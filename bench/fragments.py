@@ -0,0 +1,101 @@
+# What a click costs with the page split into fragments: server time and bytes sent
+# for a full rerun of the guard app, next to the share of it that a click inside a
+# single fragment (entry form, one user's logs panel, supervisor panel) reruns.
+#   python -m bench.fragments [--app test2.py] [--runs 20]
+#
+# AppTest always reruns the whole script, so fragment reruns cannot be driven
+# directly; instead every full rerun is split up by the fragment each delta message
+# belongs to, and each fragment's time comes from its page_* timing hook.
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import defaultdict
+
+import metrics
+from bench.apps import REPO, make_data
+
+FIVE_USERS = ["Naveen Kumar", "Rajeev Padwal", "Suresh Sagare", "Satyam Kumar", "Sagar Bamne"]
+SECTIONS = ("page_entry_form", "page_user_panel", "page_supervisor_panel")
+
+
+def capture_messages():
+    # every ForwardMsg of the latest run, taken from AppTest's local script runner
+    from streamlit.testing.v1 import local_script_runner
+
+    captured = []
+    parse = local_script_runner.parse_tree_from_messages
+
+    def parse_and_keep(messages):
+        captured[:] = messages
+        return parse(messages)
+    local_script_runner.parse_tree_from_messages = parse_and_keep
+    return captured
+
+
+def split_by_fragment(messages):
+    # -> {section title: bytes}; a fragment is named by the first markdown it draws
+    sizes, titles = defaultdict(int), {}
+    for msg in messages:
+        if not msg.HasField("delta"):
+            continue
+        fragment_id = msg.delta.fragment_id
+        sizes[fragment_id] += msg.ByteSize()
+        element = msg.delta.new_element
+        if fragment_id and fragment_id not in titles and msg.delta.HasField("new_element") and element.HasField("markdown"):
+            titles[fragment_id] = element.markdown.body.lstrip("# ")
+    return {titles.get(fragment_id, fragment_id or "outside fragments"): size for fragment_id, size in sizes.items()}
+
+
+def hook_seconds():
+    return {name: metrics.histogram(name).fold()[1] for name in SECTIONS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of a full rerun vs a fragment rerun")
+    parser.add_argument("--app", default="test2.py")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    folder = tempfile.mkdtemp(prefix="bench-fragments-")
+    make_data(folder, 20000, 30, 400)
+    os.chdir(folder)
+    messages = capture_messages()
+
+    # five users logged in on one device, every logs panel showing a page
+    at = AppTest.from_file(os.path.join(REPO, args.app), default_timeout=120).run()
+    at.session_state["logged_in_users"] = list(FIVE_USERS)
+    at.session_state["current_user"] = FIVE_USERS[0]
+    for user in FIVE_USERS:
+        at.session_state[f"log_page_{user}"] = 0
+    at.run()
+    if at.exception:
+        sys.exit(f"{args.app}: {at.exception[0].proto.message}")
+
+    before = hook_seconds()
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        at.run()
+    full_ms = (time.perf_counter() - started) / args.runs * 1000
+    after = hook_seconds()
+    section_ms = {name: (after[name] - before[name]) / args.runs * 1000 for name in SECTIONS}
+    section_ms["page_user_panel"] /= len(FIVE_USERS)
+
+    sizes = split_by_fragment(messages)
+    full_kb = sum(sizes.values()) / 1024
+    print(f"{args.app}, {len(FIVE_USERS)} users logged in, all logs panels open")
+    print(f"  full rerun: {full_ms:.1f} ms, {full_kb:.0f} KB sent")
+    print(f"  {'a click in':<36}{'ms':>8}{'':>6}{'KB':>8}{'':>6}")
+    for title, size in sizes.items():
+        if title == "outside fragments":
+            continue
+        hook = "page_user_panel" if title.startswith("Logs & Summary") else "page_supervisor_panel" if "Inside" in title else "page_entry_form"
+        kb = size / 1024
+        print(f"  {title[:35]:<36}{section_ms[hook]:>8.1f}{section_ms[hook] / full_ms:>6.0%}{kb:>8.1f}{kb / full_kb:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
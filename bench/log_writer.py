@@ -0,0 +1,48 @@
+# Peak-traffic check for the gate log writer: several threads (guard sessions)
+# submit entries at once and the writer reports throughput and latency.
+#   python -m bench.log_writer [sessions] [entries_per_session]
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import gate_log
+
+
+def main(sessions=8, entries=250):
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-bench-")
+    barrier = threading.Barrier(sessions)
+
+    def session(n):
+        barrier.wait()
+        for i in range(entries):
+            gate = 1 + (n + i) % 2
+            gate_log.append_record(gate, f"Guard {n}", "Car", f"MH01AB{i:04d}", "F803", "IN" if i % 2 else "OUT")
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    total = sessions * entries
+    logged = 0
+    for gate in (1, 2):
+        numbers = [record.entry_no for record in gate_log.read_records(gate)]
+        assert numbers == list(range(1, len(numbers) + 1)), f"gate {gate}: entry numbers must be unique and in order"
+        logged += len(numbers)
+    assert logged == total
+
+    stats = gate_log.get_writer().stats()
+    print(f"{total} entries from {sessions} sessions in {wall:.2f}s ({total / wall:.0f}/s wall)")
+    for key, value in stats.items():
+        print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+    size = sum(os.path.getsize(os.path.join(folder, f)) for folder, _, files in os.walk(gate_log.log_folder) for f in files)
+    print(f"  log folder: {gate_log.log_folder} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,47 @@
+# Cost of the timing hooks: the per-call overhead of @timed next to how long each
+# instrumented operation takes, on a short synthetic workload.
+#   python -m bench.metrics [calls]     (default: 300)
+import sys
+import time
+import tempfile
+
+import gate_log
+import metrics
+from registry import load_registry
+
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls
+
+
+def main(calls=300):
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-metrics-")
+    registry = load_registry()
+    plates = list(registry.vehicle_flat_pairs)
+
+    # workload: every instrumented gate/registry operation, a few hundred times
+    for i in range(calls):
+        gate_log.append_records(1 + i % 2, [("Bench", "Car", plates[i % len(plates)], "F1", "IN" if i % 2 else "OUT")])
+        gate_log.read_log_page(1, 0, 50)
+        gate_log.summarize(1)
+        registry.find_vehicles(plates[i % len(plates)][-4:])
+
+    # the hook itself: a timed no-op minus a bare no-op
+    noop = lambda: None
+    timed_noop = metrics.timed("bench_noop")(noop)
+    hook = per_call(timed_noop, 200000) - per_call(noop, 200000)
+
+    print(f"@timed overhead: {hook * 1e6:.2f} us per call")
+    print(f"  {'operation':<16}{'calls':>7}{'mean ms':>10}{'overhead':>10}")
+    for row in metrics.snapshot():
+        if row["Operation"] == "bench_noop":
+            continue
+        share = hook * 1000 / row["Mean ms"] if row["Mean ms"] else 0.0
+        print(f"  {row['Operation']:<16}{row['Calls']:>7}{row['Mean ms']:>10.3f}{share:>10.2%}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,63 @@
+# Batch vs row-by-row normalization: checks the outputs match, then times both.
+#   python -m bench.normalize [rows ...]     (default: 100000 1000000)
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from registry import (
+    _WHITESPACE, normalize_vehicle_input, normalize_flat_input, normalize_vehicle_series, normalize_flat_series,
+)
+
+
+def synthetic_registry(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    states = np.array(["MH", "mh", "DL", "KA", "GJ", "hr"])
+    plates = pd.Series(
+        pd.Series(states[rng.integers(0, len(states), rows)])
+        + rng.integers(1, 50, rows).astype(str)
+        + np.where(rng.random(rows) < 0.3, " ", "")
+        + pd.Series(letters[rng.integers(0, 26, rows)]) + pd.Series(letters[rng.integers(0, 26, rows)])
+        + pd.Series(rng.integers(0, 10000, rows).astype(str)).str.zfill(4).str.replace("0", "O", n=1),
+        dtype=object,
+    )
+    flats = pd.Series(rng.integers(101, 1505, rows).astype(str), dtype=object)
+    flats[rng.random(rows) < 0.5] = "F" + flats
+    flats[rng.random(rows) < 0.05] = " f-relaince "
+    plates[rng.random(rows) < 0.01] = np.nan
+    flats[rng.random(rows) < 0.01] = None
+    return plates, flats
+
+
+def check_equivalence():
+    odd = [None, np.nan, pd.NA, "", " ", 12, 12.0, True, 706.0, "o o", "　mh 01 ", "١٢", "ǆ"]
+    odd += [f"mh{ws}01{ws}o" for ws in _WHITESPACE]
+    plates, flats = synthetic_registry(20000, seed=1)
+    for values in (pd.Series(odd, dtype=object), plates, flats, pd.Series(odd + list(flats), dtype=object)):
+        assert list(normalize_vehicle_series(values)) == [normalize_vehicle_input(v) for v in values]
+        assert list(normalize_flat_series(values)) == [normalize_flat_input(v) for v in values]
+    print("batch and scalar normalizers agree")
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes):
+    check_equivalence()
+    for rows in sizes:
+        plates, flats = synthetic_registry(rows)
+        row_time = best_of(lambda: (plates.apply(normalize_vehicle_input), flats.apply(normalize_flat_input)), 1)
+        batch_time = best_of(lambda: (normalize_vehicle_series(plates), normalize_flat_series(flats)))
+        print(f"{rows:>9,} rows   apply: {row_time:7.3f}s   batch: {batch_time:7.3f}s   x{row_time / batch_time:.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,87 @@
+# Streaming registry import vs. a full rebuild: time and peak Python memory on top
+# of the live registry, for a large CSV with a small change and the same list as .xlsx.
+#   python -m bench.registry_import [rows]     (default: 300000)
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from itertools import zip_longest
+
+import pandas as pd
+
+from bench.normalize import synthetic_registry
+from registry import VehicleRegistry, read_registry_frame, iter_csv_pairs
+from registry_import import iter_xlsx_pairs
+
+
+def measure(label, setup, fn):
+    # timed without tracing (tracemalloc slows everything down), then run again for the peak
+    arg = setup()
+    started = time.perf_counter()
+    result = fn(arg)
+    seconds = time.perf_counter() - started
+    arg = setup()
+    tracemalloc.start()
+    fn(arg)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    print(f"  {label:<44}{seconds:>8.2f} s{peak:>9.1f} MB")
+    return result
+
+
+def write_xlsx(path, df):
+    # three (vehicle, flat) column pairs side by side under a header, like vehnew.xlsx
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["vehicle ", "flat number  "] * 3)
+    third = -(-len(df) // 3)
+    parts = [df.iloc[i * third:(i + 1) * third].itertuples(index=False) for i in range(3)]
+    for cells in zip_longest(*parts, fillvalue=(None, None)):
+        sheet.append([value for pair in cells for value in pair])
+    workbook.save(path)
+
+
+def main(rows=300000):
+    folder = tempfile.mkdtemp(prefix="bench-registry-import-")
+    plates, flats = synthetic_registry(rows)
+    df = pd.DataFrame({"Vehicle": plates, "FlatNumber": flats}).dropna().drop_duplicates("Vehicle")
+    csv_file = os.path.join(folder, "registry.csv")
+    df.to_csv(csv_file, index=False)
+
+    # the same list with 1% of plates moved, 1% new and 1% gone
+    changed = df.copy()
+    n = len(df) // 100
+    changed.iloc[:n, 1] = "F9999"
+    changed = changed.iloc[:-n]
+    extra = pd.DataFrame({"Vehicle": [f"ZZ{i:02d}NEW{i:05d}"[:12] for i in range(n)], "FlatNumber": "F101"})
+    changed = pd.concat([changed, extra])
+    changed_file = os.path.join(folder, "registry-changed.csv")
+    changed.to_csv(changed_file, index=False)
+    xlsx_file = os.path.join(folder, "registry.xlsx")
+    write_xlsx(xlsx_file, changed)
+
+    live = lambda: VehicleRegistry(read_registry_frame(csv_file))
+    frame = read_registry_frame(csv_file)
+    tracemalloc.start()
+    registry = VehicleRegistry(frame)
+    held = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    index = registry.search_index
+    print(f"live registry: {held:.0f} MB held per server process, "
+          f"search index arrays {(index.key_hashes.nbytes + index.key_ids.nbytes) / 2**20:.0f} MB")
+    del frame, registry, index
+
+    print(f"{len(df):,} plates; 1% moved, 1% added, 1% removed")
+    print(f"  {'':<44}{'time':>10}{'peak':>12}   (peak: Python allocations on top of the live registry)")
+    measure("full rebuild (read_csv + VehicleRegistry)", lambda: None, lambda _: VehicleRegistry(read_registry_frame(changed_file)))
+    diff = measure("incremental apply, CSV in chunks", live, lambda registry: registry.apply(iter_csv_pairs(changed_file), replace=True))
+    print(f"    {diff}")
+    diff = measure("incremental apply, .xlsx read-only stream", live, lambda registry: registry.apply(iter_xlsx_pairs(xlsx_file), replace=True))
+    print(f"    {diff}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
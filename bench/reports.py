@@ -0,0 +1,115 @@
+# Reports over a synthetic year of two-gate traffic: checks the vectorized
+# reports against a plain loop over the records, then times both.
+#   python -m bench.reports [events_per_gate_per_day]     (default: 400)
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import gate_log
+import reports
+from registry import load_registry
+
+
+def synthetic_year(events_per_day, days=365, gates=(1, 2), seed=0):
+    # Residents' vehicles go IN and come back OUT hours later; about 5% of the
+    # plates are unknown visitors. Traffic peaks in the morning and evening.
+    rng = np.random.default_rng(seed)
+    registry = load_registry()
+    plates = np.array(list(registry.vehicle_flat_pairs))
+    # a flat too long for the log is logged as Unknown Flat, as gate_app.log_flat does
+    flats = np.array([flat if gate_log.fits("flat", flat) else reports.UNKNOWN_FLAT
+                      for flat in (registry.vehicle_flat_pairs[plate] for plate in plates)])
+    visitors = np.array([f"MH{rng.integers(1, 50):02d}V{n:04d}" for n in range(200)])
+    hour_weights = np.array([1, 1, 1, 1, 1, 2, 4, 8, 10, 8, 5, 4, 4, 4, 4, 5, 6, 8, 10, 9, 6, 4, 2, 1], dtype=float)
+    first_day = gate_log.today() - timedelta(days=days - 1)
+    start = gate_log.IST.localize(datetime.combine(first_day, datetime.min.time())).timestamp()
+
+    rows = {gate: [] for gate in gates}
+    visits = events_per_day * days // 2
+    for gate in gates:
+        day = rng.integers(0, days, visits)
+        hour = rng.choice(24, visits, p=hour_weights / hour_weights.sum())
+        time_in = start + day * 86400 + hour * 3600 + rng.integers(0, 3600, visits)
+        time_out = time_in + rng.exponential(4 * 3600, visits) + 60
+        visitor = rng.random(visits) < 0.05
+        pick = rng.integers(0, len(plates), visits)
+        numbers = np.where(visitor, visitors[rng.integers(0, len(visitors), visits)], plates[pick])
+        flat = np.where(visitor, reports.UNKNOWN_FLAT, flats[pick])
+        types = rng.choice(["Car", "Bike", "Scooty", "Taxi", "EV"], visits)
+        events = [(t, "IN", v, n, f, "Bench") for t, v, n, f in zip(time_in, types, numbers, flat)]
+        events += [(t, "OUT", v, n, f, "Bench") for t, v, n, f in zip(time_out, types, numbers, flat) if t < time.time()]
+        events.sort()
+        rows[gate] = events
+    return first_day, rows
+
+
+def reference(records):
+    # the same reports the obvious way: one Python pass over the records, oldest first
+    seen, previous, hourly, visit_hours, unknown = set(), {}, {}, {}, {}
+    for r in records:
+        if (r.gate, r.ts, r.number, r.action) in seen:
+            continue
+        seen.add((r.gate, r.ts, r.number, r.action))
+        hour = datetime.fromtimestamp(r.ts, gate_log.IST).hour
+        hourly[(hour, r.gate, r.action)] = hourly.get((hour, r.gate, r.action), 0) + 1
+        last = previous.get(r.number)
+        if r.action == "OUT" and last is not None and last.action == "IN":
+            visit_hours.setdefault(last.flat, []).append((r.ts - last.ts) / 3600)
+        previous[r.number] = r
+        if r.flat == reports.UNKNOWN_FLAT:
+            unknown[r.number] = unknown.get(r.number, 0) + 1
+    inside = {number for number, r in previous.items() if r.action == "IN"}
+    return hourly, inside, visit_hours, unknown
+
+
+def main(events_per_day=400):
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-reports-")
+    started = time.perf_counter()
+    first_day, rows = synthetic_year(events_per_day)
+    for gate, gate_rows in rows.items():
+        gate_log._write_records(gate, gate_rows)
+        gate_log.rotate(gate)
+    total = sum(len(gate_rows) for gate_rows in rows.values())
+    print(f"{total} entries over a year, 2 gates, written in {time.perf_counter() - started:.1f}s")
+
+    timings = {}
+    started = time.perf_counter()
+    df = reports.load_entries((1, 2), first_day, gate_log.today())
+    timings["load_entries"] = time.perf_counter() - started
+    results = {}
+    for name in ("hourly_load", "occupancy", "dwell_by_flat", "unknown_flat_plates"):
+        started = time.perf_counter()
+        results[name] = getattr(reports, name)(df)
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    records = gate_log.read_records(1, first_day, gate_log.today()) + gate_log.read_records(2, first_day, gate_log.today())
+    records.sort(key=lambda r: r.ts)
+    hourly, inside, visit_hours, unknown = reference(records)
+    loop_time = time.perf_counter() - started
+
+    days = df["time"].dt.normalize().nunique()
+    load = results["hourly_load"]
+    for (hour, gate, action), count in hourly.items():
+        assert abs(load.loc[hour, f"Gate {gate} {action}"] * days - count) < 1e-6
+    assert set(results["occupancy"]["Number"]) == inside
+    flats = results["dwell_by_flat"]
+    for flat, hours in visit_hours.items():
+        if flat != reports.UNKNOWN_FLAT:
+            assert flats.loc[flat, "Visits"] == len(hours)
+            assert abs(flats.loc[flat, "Median hours"] - round(float(np.median(hours)), 2)) < 0.011
+    top = results["unknown_flat_plates"]
+    assert list(top["Entries"]) == sorted(unknown.values(), reverse=True)[:len(top)]
+
+    for name, seconds in timings.items():
+        print(f"  {name:<20} {seconds * 1000:8.0f} ms")
+    print(f"  {'vectorized total':<20} {sum(timings.values()) * 1000:8.0f} ms")
+    print(f"  {'python loop':<20} {loop_time * 1000:8.0f} ms")
+    print(f"  {len(results['occupancy'])} vehicles inside, {len(flats)} flats, {len(unknown)} unknown plates")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
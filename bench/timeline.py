@@ -0,0 +1,100 @@
+# All-gates timeline over a synthetic year of three-gate traffic: checks the k-way
+# merge against sorting everything, then times pages and measures their memory.
+#   python -m bench.timeline [events_per_gate_per_day]     (default: 400)
+import sys
+import time
+import tempfile
+import tracemalloc
+from datetime import time as clock_time
+
+import gate_log
+import timeline
+from bench.reports import synthetic_year
+
+GATES = (1, 2, 3)
+
+
+def reference(spec, first_day, last_day):
+    # every record of every gate, filtered in Python and sorted as a whole
+    records = [r for gate in GATES for r in gate_log.read_records(gate, first_day, last_day)]
+    plate, flat, user = spec.plate.decode(), spec.flat.decode(), spec.user.decode().strip(gate_log.GUARD_SEP)
+    records = [r for r in records if spec.start_ts <= r.ts <= spec.end_ts and plate in r.number
+               and (not flat or r.flat == flat) and (not user or user in gate_log.split_guards(r.user))]
+    return sorted(records, key=timeline.cursor_of)
+
+
+def out_of_order():
+    # two sessions stamp their entries, then reach the writer in the other order:
+    # every entry must still turn up exactly once when paging one at a time
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-timeline-order-")
+    now = time.time()
+    for ts, number in ((now + 0.002, "AAA1"), (now + 0.001, "BBB2"), (now + 0.003, "CCC3")):
+        gate_log._write_records(1, [(ts, "IN", "Car", number, "F101", "Bench")])
+    gate_log._write_records(2, [(now + 0.0025, "IN", "Car", "DDD4", "F101", "Bench"), (now, "IN", "Car", "EEE5", "F101", "Bench")])
+    spec = timeline.make_filter(gate_log.today(), gate_log.today())
+    paged, cursor = [], None
+    while True:
+        page, cursor = timeline.timeline_page(spec, cursor, 1, (1, 2))
+        paged += page
+        if cursor is None:
+            break
+    assert sorted(r.number for r in paged) == ["AAA1", "BBB2", "CCC3", "DDD4", "EEE5"], [r.number for r in paged]
+    assert paged == list(timeline.iter_timeline(spec, (1, 2)))
+    print(f"out-of-order writes: {len(paged)} entries, all found paging one at a time")
+
+
+def main(events_per_day=400):
+    out_of_order()
+    gate_log.log_folder = tempfile.mkdtemp(prefix="gate-log-timeline-")
+    first_day, rows = synthetic_year(events_per_day, gates=GATES)
+    last_day = gate_log.today()
+    for gate, gate_rows in rows.items():
+        gate_log._write_records(gate, gate_rows)
+        gate_log.rotate(gate)
+    total = sum(len(gate_rows) for gate_rows in rows.values())
+    some = rows[2][len(rows[2]) // 2]
+
+    # the merge gives exactly what sorting everything gives, filters included
+    specs = {
+        "everything": timeline.make_filter(first_day, last_day),
+        "one plate": timeline.make_filter(first_day, last_day, plate=some[3]),
+        "plate suffix, flat": timeline.make_filter(first_day, last_day, plate=some[3][-4:], flat=some[4]),
+        "one day, 8-10 am": timeline.make_filter(last_day, last_day, clock_time(8), clock_time(10)),
+    }
+    for name, spec in specs.items():
+        merged = list(timeline.iter_timeline(spec, GATES))
+        assert merged == reference(spec, first_day, last_day), name
+        # walking page by page gives the same entries again
+        paged, cursor = [], None
+        while True:
+            page, cursor = timeline.timeline_page(spec, cursor, 5000, GATES)
+            paged += page
+            if cursor is None:
+                break
+        assert paged == merged, name
+        print(f"{name:<20}{len(merged):>9,} entries match the sorted reference")
+
+    spec = specs["everything"]
+    print(f"\n{total:,} entries over {len(GATES)} gates and a year ({total * gate_log.RECORD.size / 2**20:.0f} MB of records)")
+    cursor = None
+    for page in range(1, 4):
+        started = time.perf_counter()
+        records, cursor = timeline.timeline_page(spec, cursor, 50, GATES)
+        print(f"  page {page} of 50:  {(time.perf_counter() - started) * 1000:7.1f} ms")
+    middle = timeline.cursor_of(reference(specs["one day, 8-10 am"], first_day, last_day)[0])
+    started = time.perf_counter()
+    timeline.timeline_page(spec, middle, 50, GATES)
+    print(f"  page after a cursor on the last day: {(time.perf_counter() - started) * 1000:7.1f} ms")
+
+    tracemalloc.start()
+    timeline.timeline_page(spec, None, 50, GATES)
+    page_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    timeline.timeline_page(specs["one plate"], None, 50, GATES)   # scans the whole year for one plate
+    scan_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  peak memory, first page: {page_peak / 2**20:.1f} MB; one-plate page scanning the year: {scan_peak / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
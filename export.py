@@ -0,0 +1,170 @@
+import os
+import sys
+import argparse
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import gate_log
+from gate_log import list_gates, log_days, read_columns
+from metrics import timed
+from reports import categorical
+from timeline import filter_block
+
+# ===== Bulk export =====
+# Gate logs for a period, all gates in time order, written to CSV, an Excel
+# workbook (one sheet per month) or Parquet. Records stream through in chunks of
+# about CHUNK_ROWS: days are read one at a time, merged across gates, turned into
+# a small DataFrame and written out, so neither the log nor the output rows are
+# ever held in memory as a whole.
+#
+# The timeline panel exports its filtered view the same way, with its filter
+# applied to every day before it joins a chunk.
+#
+#   python export.py 2026-09-01 2026-09-30 september.xlsx [--gates 1 2]
+CHUNK_ROWS = 50000
+COLUMNS = ["Date", "Time", "Gate", "Action", "Number", "Flat", "Vehicle", "User", "Entry No."]
+EXCEL_MAX_ROWS = 1048576
+
+# India has had no daylight saving since 1945, so local time is UTC + 5:30 and
+# the clock time of any timestamp can be looked up by its second of the day
+IST_OFFSET = 5 * 3600 + 1800
+_CLOCK = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object)
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_chunks(gates, start, end, chunk_rows=CHUNK_ROWS, spec=None):
+    # structured record arrays of all gates, oldest first, each of about chunk_rows;
+    # with a timeline filter spec only the matching entries
+    for gate in gates:
+        gate_log.ensure_migrated(gate)
+    days = sorted({day for gate in gates for day in log_days(gate, start, end)})
+    pending, size = [], 0
+    for day in days:
+        records = np.concatenate([read_columns(gate, day, day) for gate in gates])
+        if spec is not None:
+            records = filter_block(records, spec)
+        pending.append(records[np.lexsort((records["entry_no"], records["gate"], records["ts"]))])
+        size += len(records)
+        if size >= chunk_rows:
+            yield np.concatenate(pending)
+            pending, size = [], 0
+    if size:
+        yield np.concatenate(pending)
+
+
+def chunk_to_frame(records):
+    local = records["ts"].astype(np.int64) + IST_OFFSET
+    day_numbers, day_codes = np.unique(local // 86400, return_inverse=True)
+    day_names = [(date(1970, 1, 1) + timedelta(days=int(n))).strftime("%d-%m-%Y") for n in day_numbers]
+    return pd.DataFrame({
+        "Date": pd.Categorical.from_codes(day_codes.astype(np.int32), day_names),
+        "Time": _CLOCK[local % 86400],
+        "Gate": records["gate"].astype(np.int16),
+        "Action": categorical(records["action"]),
+        "Number": categorical(records["number"]),
+        "Flat": categorical(records["flat"]),
+        "Vehicle": categorical(records["vehicle_type"]),
+        "User": categorical(records["user"]),
+        "Entry No.": records["entry_no"].astype(np.int64),
+    }, columns=COLUMNS)
+
+
+# ----- writers: each takes an output path and the chunk frames, returns rows written -----
+def write_csv(path, frames):
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(COLUMNS) + "\r\n")   # csv.writer line endings
+        for frame in frames:
+            frame.to_csv(f, header=False, index=False, lineterminator="\r\n")
+            rows += len(frame)
+    return rows
+
+
+def write_xlsx(path, frames):
+    # openpyxl write-only mode streams rows to disk; a new sheet starts every month
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet, sheet_name, sheet_rows, rows = None, None, 0, 0
+    for frame in frames:
+        months = frame["Date"].astype(str).str[3:]   # "MM-YYYY"
+        for month, part in frame.groupby(months, sort=False, observed=True):
+            for row in part.itertuples(index=False, name=None):
+                if month != sheet_name or sheet_rows >= EXCEL_MAX_ROWS:
+                    title = month if month != sheet_name else f"{month} ({len(workbook.worksheets) + 1})"
+                    sheet, sheet_name, sheet_rows = workbook.create_sheet(title), month, 1
+                    sheet.append(COLUMNS)
+                sheet.append(row)
+                sheet_rows += 1
+                rows += 1
+    if sheet is None:
+        workbook.create_sheet("No entries").append(COLUMNS)
+    workbook.save(path)
+    return rows
+
+
+def write_parquet(path, frames):
+    # one row group per chunk; text columns stay dictionary-encoded
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    text = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema([(name, pa.int16() if name == "Gate" else pa.int64() if name == "Entry No." else text) for name in COLUMNS])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in frames:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            rows += len(frame)
+    return rows
+
+
+# format name -> (file extension, MIME type, writer)
+FORMATS = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+}
+
+
+def available_formats():
+    return [name for name in FORMATS if name != "Parquet" or parquet_available()]
+
+
+@timed("export")
+def export_logs(path, fmt, gates=None, start=None, end=None, spec=None):
+    # writes the entries of start..end (default today) to path, only those passing
+    # the timeline filter spec if one is given; returns the rows written
+    gates = list_gates() if gates is None else gates
+    start, end = start or gate_log.today(), end or start or gate_log.today()
+    frames = (chunk_to_frame(records) for records in iter_chunks(gates, start, end, spec=spec))
+    return FORMATS[fmt][2](path, frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export gate logs to CSV, Excel or Parquet")
+    parser.add_argument("start", type=date.fromisoformat)
+    parser.add_argument("end", type=date.fromisoformat)
+    parser.add_argument("path", help="output file; .csv, .xlsx or .parquet")
+    parser.add_argument("--gates", type=int, nargs="+")
+    args = parser.parse_args()
+
+    extension = os.path.splitext(args.path)[1].lstrip(".").lower()
+    fmt = next((name for name, (ext, _, _) in FORMATS.items() if ext == extension), None)
+    if fmt is None or fmt not in available_formats():
+        sys.exit(f"Cannot export to {args.path}: use one of {', '.join(FORMATS[name][0] for name in available_formats())}")
+    started = datetime.now()
+    rows = export_logs(args.path, fmt, args.gates, args.start, args.end)
+    print(f"{rows} entries -> {args.path} in {(datetime.now() - started).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
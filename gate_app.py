@@ -0,0 +1,403 @@
+import os
+import re
+import tempfile
+from datetime import time, timedelta
+
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+import metrics
+from metrics import timed
+from registry import load_registry, normalize_vehicle_input
+from gate_log import append_records, format_record, read_log_page, records_to_frame, clear_log, summarize, today, format_time, get_writer, list_gates, join_guards, fits, TEXT_WIDTHS
+from presence import get_presence, presence_to_frame
+from reports import load_entries, hourly_load, occupancy, dwell_by_flat, unknown_flat_plates
+from timeline import make_filter, timeline_page, timeline_to_frame
+from export import FORMATS, available_formats, export_logs
+
+# ===== Shared gate app =====
+# Everything test2.py and Test4.py have in common: users, logging, summaries and
+# the page sections. Streamlit re-executes the app script on every rerun, but an
+# imported module is loaded once per server process, so none of this is rebuilt
+# per rerun and the two apps cannot drift apart.
+raw_file = "vehicle_flat_pairs.csv"
+
+# ===== Guard + Supervisor Authentication =====
+users = {
+    # Guards
+    "Naveen Kumar": "482915",
+    "Rajeev Padwal": "736204",
+    "Suresh Sagare": "591837",
+    "Babban": "264905",
+    "Manoj": "853192",
+    "pramod": "670481",
+    "Sandeep Karekar": "309572",
+    # Supervisors
+    "Satyam Kumar": "927364",
+    "Sagar Bamne": "615283"
+}
+guard_users = ["Naveen Kumar","Rajeev Padwal","Suresh Sagare","Babban","Manoj","Rajaram","Sandeep Karekar","pramod"]
+
+LOG_PAGE_SIZE = 50
+
+
+def get_registry():
+    # Shared by all sessions; only re-read when the CSV changes
+    return load_registry(raw_file)
+
+
+# ===== Helper functions =====
+@timed("log_entry")
+def log_entries(gate, guards, vehicle_type, vehicle_numbers, action):
+    # One entry per vehicle with every guard on duty on it. A convoy of plates is
+    # looked up in the registry in one pass and handed to the log writer as one batch.
+    numbers = list(dict.fromkeys(number for number in map(normalize_vehicle_input, vehicle_numbers) if number))
+    if not numbers:
+        return []
+    too_long = [number for number in numbers if not fits("number", number)]
+    if too_long:
+        raise ValueError(f"Vehicle number too long (max {TEXT_WIDTHS['number']} characters): {', '.join(too_long)}")
+    flats = get_registry().vehicle_flat_pairs
+    user = join_guards(guards)
+    records = append_records(gate, [(user, vehicle_type, number, log_flat(flats.get(number, "Unknown Flat")), action)
+                                    for number in numbers])
+    get_presence().record(records)
+    return records
+
+
+def log_flat(flat):
+    # A registry "flat" longer than the log's flat field is a mistake in the sheet
+    # (a name typed in the flat column). The vehicle stays in the registry for
+    # lookups; its entries are logged as Unknown Flat, so the guard asks for the flat.
+    return flat if fits("flat", flat) else "Unknown Flat"
+
+
+def split_vehicle_numbers(text):
+    # "MH12AB1234, MH12CD5678" or one plate per line -> ["MH12AB1234", "MH12CD5678"]
+    return [number for number in re.split(r"[,;\n]+", text) if number.strip()]
+
+
+@timed("generate_summary")
+def generate_summary(gate, day=None):
+    summary = summarize(gate, day)
+    if not summary:
+        return "कोई डेटा उपलब्ध नहीं है।"
+
+    when = "आज" if day in (None, today()) else day.strftime("%d-%m-%Y") + " को"
+    summary_text = ""
+    count = 1
+    for vehicle, counts in summary.items():
+        summary_text += (
+            f"**No.{count} → {vehicle}**: {when} कुल 🟢 {counts['IN']} {vehicle} अंदर आई और 🔴 {counts['OUT']} {vehicle} बाहर गई।\n\n"
+        )
+        count += 1
+    return summary_text
+
+
+def logged_in_guards():
+    return [u for u in st.session_state.logged_in_users if u in guard_users]
+
+
+# ===== Page sections =====
+# The entry form, each user's logs panel and the supervisor panel are fragments:
+# a click inside one reruns and re-sends only that section, not the login block,
+# the voice widget or the other users' panels. Anything that changes the layout
+# (login/logout) still reruns the whole page.
+def rerun_section():
+    # rerun just the fragment when this is a fragment run, the whole page otherwise
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def start_page():
+    if not os.path.exists(raw_file):
+        st.error(f"File not found: {raw_file}")
+        st.stop()
+    get_registry()
+    get_presence()              # who is inside right now, built once per process
+    metrics.start_exporting()   # timings of the hot paths, dumped to vehicle_logs/metrics-<pid>.prom while the app runs
+
+    # Session state
+    if "logged_in_users" not in st.session_state:
+        st.session_state.logged_in_users = []
+    if "current_user" not in st.session_state:
+        st.session_state.current_user = None
+
+
+def login_section():
+    st.markdown("<h1 style='color:blue; text-align:center;'>🚓 Rishabh Tower Vehicle Log</h1>", unsafe_allow_html=True)
+
+    if st.session_state.current_user is None:
+        st.markdown("### User Login 🔐")
+        available_users = list(users.keys())
+        selected_user = st.selectbox("Select your name", available_users)
+        password_input = st.text_input("Enter your 6-digit password", type="password")
+
+        if st.button("Login"):
+            if selected_user in users and password_input == users[selected_user]:
+                if len(st.session_state.logged_in_users) < 5:   # ✅ Limit 5 users
+                    st.session_state.logged_in_users.append(selected_user)
+                    st.session_state.current_user = selected_user
+                    st.success(f"Welcome {selected_user}! You are logged in.")
+                else:
+                    st.warning("⚠️ Maximum 5 users already logged in.")
+            else:
+                st.error("❌ Incorrect password. Access denied.")
+    else:
+        st.info(f"Logged in as: {st.session_state.current_user}")
+
+    # Show currently logged-in users
+    if st.session_state.logged_in_users:
+        st.info(f"Currently logged-in users: {', '.join(st.session_state.logged_in_users)}")
+
+    # Logout Section for each user
+    for user in st.session_state.logged_in_users.copy():
+        if st.button(f"🚪 Log Out {user}"):
+            st.session_state.logged_in_users.remove(user)
+            if st.session_state.current_user == user:
+                st.session_state.current_user = None
+            st.success(f"{user} logged out successfully.")
+
+
+def entry_section():
+    # Vehicle logging, for guards only
+    if logged_in_guards():
+        entry_form()
+
+
+@st.fragment
+@timed("page_entry_form")
+def entry_form():
+    guards = logged_in_guards()
+
+    st.markdown("### Select Gate:")
+    gate = st.radio("Choose Gate", [1, 2], horizontal=True)
+
+    st.markdown("### Vehicle Action:")
+    action = st.radio("Select Action", ["IN", "OUT"], horizontal=True)
+
+    st.markdown("### Vehicle Details:")
+    vehicle_type = st.selectbox("Vehicle Type", ["Car", "Bike", "Scooty", "Taxi", "EV"])
+    vehicle_number = st.text_input("Enter Vehicle Number", max_chars=TEXT_WIDTHS["number"])
+
+    if st.button("Submit Entry", use_container_width=True):
+        if vehicle_number:
+            submit_entries(gate, guards, vehicle_type, [vehicle_number], action)
+        else:
+            st.error("⚠️ Please enter Vehicle Number")
+
+    # 🚌 Several vehicles together (school buses, a convoy): one submit, one write
+    with st.expander("🚌 Convoy: several vehicles at once"):
+        convoy = st.text_area("Vehicle numbers, one per line or separated by commas", key="convoy_numbers")
+        if st.button("Submit Convoy", key="submit_convoy", use_container_width=True):
+            numbers = split_vehicle_numbers(convoy)
+            if numbers:
+                submit_entries(gate, guards, vehicle_type, numbers, action)
+            else:
+                st.error("⚠️ Please enter Vehicle Numbers")
+
+
+def submit_entries(gate, guards, vehicle_type, vehicle_numbers, action):
+    presence = get_presence()
+    mismatches = [presence.check(number, action) for number in vehicle_numbers]
+    try:
+        records = log_entries(gate, guards, vehicle_type, vehicle_numbers, action)
+    except ValueError as e:
+        st.error(f"⚠️ {e}. Kuch bhi log nahi hua, number check karein.")
+        return
+    if len(records) == 1:
+        st.success(f"✅ Entry logged successfully by {join_guards(guards)}!")
+    else:
+        st.success(f"✅ {len(records)} entries logged successfully by {join_guards(guards)}!")
+    for record in records:
+        st.markdown(f"<p style='color:blue; font-size:18px;'>{format_record(record)}</p>", unsafe_allow_html=True)
+
+    # 🔔 Show Hindi alert in red if flat is unknown
+    unknown = [record.number for record in records if record.flat == "Unknown Flat"]
+    if unknown:
+        st.markdown(
+            "<p style='color:red; font-size:18px;'>"
+            f"Please note: {', '.join(unknown) if len(records) > 1 else 'ye vehicle'} Rishabh tower ki vehicle  list me nahi hai, "
+            "vehicle ke owner se flat number puchhe. "
+            "</p>",
+            unsafe_allow_html=True
+        )
+    for mismatch in dict.fromkeys(filter(None, mismatches)):
+        st.warning(mismatch)
+
+
+def logs_section():
+    # Logs and summary for every logged-in user, supervisors can see everything
+    for user in st.session_state.logged_in_users:
+        user_panel(user)
+
+
+def _set_log_page(user, page):
+    st.session_state[f"log_page_{user}"] = page
+
+
+@st.fragment
+@timed("page_user_panel")
+def user_panel(user):
+    st.markdown(f"### Logs & Summary for {user}")
+
+    if user in guard_users:
+        gate = st.radio(f"Select Gate for {user}", [1,2], key=f"gate_{user}")
+    else:
+        gate = st.radio(f"Select Gate for supervisor {user}", [1,2], key=f"gate_{user}")
+    log_day = st.date_input(f"Day for {user}", value=today(), max_value=today(), key=f"day_{user}")
+
+    if st.button(f"📖 Show Logs Gate {gate} ({user})", key=f"showlog_{user}", use_container_width=True):
+        st.session_state[f"log_page_{user}"] = 0
+
+    # Newest entries first, one page at a time
+    log_page = st.session_state.get(f"log_page_{user}")
+    if log_page is not None:
+        records, total = read_log_page(gate, log_page, LOG_PAGE_SIZE, log_day)
+        if records:
+            st.dataframe(records_to_frame(records), hide_index=True, use_container_width=True)
+            st.caption(f"Showing entries {records[-1].entry_no}–{records[0].entry_no} of {total}")
+            older_col, newer_col, hide_col = st.columns(3)
+            # callbacks run before the panel reruns, so the new page is drawn straight away
+            older_col.button("⬅️ Older", key=f"older_{user}", disabled=(log_page + 1) * LOG_PAGE_SIZE >= total,
+                             on_click=_set_log_page, args=(user, log_page + 1))
+            newer_col.button("Newer ➡️", key=f"newer_{user}", disabled=log_page == 0,
+                             on_click=_set_log_page, args=(user, log_page - 1))
+            hide_col.button("Hide Logs", key=f"hidelog_{user}", on_click=_set_log_page, args=(user, None))
+        else:
+            st.info("No logs for this gate on that day.")
+
+    if st.button(f"📊 Show Summary Gate {gate} ({user})", key=f"summary_{user}", use_container_width=True):
+        summary = generate_summary(gate, log_day)
+        st.markdown(f"<div style='color:green; font-size:18px; font-weight:bold;'>{summary}</div>", unsafe_allow_html=True)
+
+    if st.button(f"🗑️ Clear Log Gate {gate} ({user})", key=f"clear_{user}", use_container_width=True):
+        if user == "Naveen Kumar":   # ✅ Only Naveen can clear logs
+            clear_log(gate)
+            st.warning(f"Today's logs for Gate {gate} cleared by {user}!")
+        else:
+            st.error("❌ Only Naveen Kumar is authorized to clear logs.")
+
+
+def supervisor_section():
+    # Presence, diagnostics, reports, the all-gates timeline and exports, for supervisors only
+    if [u for u in st.session_state.logged_in_users if u not in guard_users]:
+        supervisor_panel()
+        timeline_panel()
+        export_panel()
+
+
+@st.fragment
+@timed("page_supervisor_panel")
+def supervisor_panel():
+    presence = get_presence()
+    st.markdown("### 🚗 Vehicles Inside Now")
+    lookup = st.text_input("Is this vehicle inside? Enter number", key="presence_lookup")
+    if lookup:
+        status = presence.status(lookup)
+        if status is None:
+            st.info(f"{normalize_vehicle_input(lookup)} ka koi entry nahi mila.")
+        elif status.action == "IN":
+            st.success(f"✅ {status.number} ({status.flat}) andar hai: {format_time(status.ts)} ko Gate {status.gate} se IN hui.")
+        else:
+            st.warning(f"🚪 {status.number} ({status.flat}) bahar hai: {format_time(status.ts)} ko Gate {status.gate} se OUT hui.")
+    inside_now = presence.inside()
+    st.metric("Vehicles inside", len(inside_now))
+    st.dataframe(presence_to_frame(inside_now), hide_index=True, use_container_width=True)
+
+    st.markdown("### 🩺 Diagnostics")
+    st.caption("Time spent in the hot paths since this server started (all sessions)")
+    st.dataframe(metrics.snapshot(), hide_index=True, use_container_width=True)
+    writer_stats = get_writer().stats()
+    st.caption(
+        f"Log writer: {writer_stats['entries']} entries in {writer_stats['batches']} batches, "
+        f"p95 {writer_stats['latency_ms_p95']:.1f} ms from submit to disk, {writer_stats['queued']} queued"
+    )
+    st.download_button("⬇️ Download metrics (Prometheus text)", metrics.render_prometheus(), file_name="metrics.prom", key="metrics_download")
+
+    st.markdown("### 📈 Reports (Supervisors)")
+    report_days = st.date_input("Report period", value=(today() - timedelta(days=29), today()), max_value=today(), key="report_days")
+    report_gates = st.multiselect("Gates", [1, 2], default=[1, 2], key="report_gates")
+
+    if st.button("📈 Build Reports", key="build_reports", use_container_width=True):
+        start_day, end_day = report_days if len(report_days) == 2 else (report_days[0], report_days[0])
+        entries = load_entries(report_gates, start_day, end_day)
+        if entries.empty:
+            st.info("No entries in this period.")
+        else:
+            st.markdown("#### Hourly gate load (average entries per day)")
+            st.bar_chart(hourly_load(entries))
+            st.markdown("#### Vehicles inside at the end of the period")
+            st.dataframe(occupancy(entries), hide_index=True, use_container_width=True)
+            st.markdown("#### Visits and dwell time per flat")
+            st.dataframe(dwell_by_flat(entries), use_container_width=True)
+            st.markdown("#### Most frequent unknown-flat vehicles")
+            st.dataframe(unknown_flat_plates(entries), hide_index=True, use_container_width=True)
+
+
+@st.fragment
+@timed("page_timeline_panel")
+def timeline_panel():
+    # every gate in one time-ordered list, oldest first, to follow a vehicle across gates
+    st.markdown("### 🕒 All Gates Timeline")
+    timeline_days = st.date_input("Timeline days", value=(today(), today()), max_value=today(), key="timeline_days")
+    start_day, end_day = timeline_days if len(timeline_days) == 2 else (timeline_days[0], timeline_days[0])
+    from_col, to_col = st.columns(2)
+    start_time = from_col.time_input("From", value=time(0, 0), key="timeline_from")
+    end_time = to_col.time_input("To", value=time(23, 59), key="timeline_to").replace(second=59, microsecond=999999)
+    plate_col, flat_col, user_col = st.columns(3)
+    plate = plate_col.text_input("Vehicle number contains", key="timeline_plate")
+    flat = flat_col.text_input("Flat", key="timeline_flat")
+    user = user_col.selectbox("User", ["All"] + sorted(set(users) | set(guard_users)), key="timeline_user")
+    spec = make_filter(start_day, end_day, start_time, end_time, plate, flat, "" if user == "All" else user)
+
+    # where each page shown so far starts; new filters start over at page 1
+    if st.session_state.get("timeline_spec") != spec:
+        st.session_state.timeline_spec = spec
+        st.session_state.timeline_cursors = [None]
+    cursors = st.session_state.timeline_cursors
+    records, next_cursor = timeline_page(spec, cursors[-1], LOG_PAGE_SIZE)
+    if records:
+        st.dataframe(timeline_to_frame(records), hide_index=True, use_container_width=True)
+        st.caption(f"Page {len(cursors)}")
+    else:
+        st.info("No entries match these filters.")
+    earlier_col, later_col, export_col = st.columns(3)
+    earlier_col.button("⬅️ Earlier", key="timeline_earlier", disabled=len(cursors) == 1, on_click=cursors.pop)
+    later_col.button("Later ➡️", key="timeline_later", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
+    if export_col.button("📤 Export", key="timeline_export"):
+        # streamed to a file in chunks like the bulk export, never built up in memory
+        file_name = f"timeline_{start_day}_{end_day}.csv"
+        with tempfile.TemporaryDirectory(prefix="gate-export-") as folder:
+            path = os.path.join(folder, file_name)
+            with st.spinner("Exporting..."):
+                rows = export_logs(path, "CSV", None, start_day, end_day, spec)
+            with open(path, "rb") as f:
+                st.download_button(f"⬇️ Download timeline, {rows} entries (CSV)", f, file_name=file_name,
+                                   mime="text/csv", key="timeline_download")
+
+
+@st.fragment
+@timed("page_export_panel")
+def export_panel():
+    # whole months of logs for management reports, streamed to a file and handed over as one download
+    st.markdown("### 📦 Export Logs")
+    export_days = st.date_input("Export period", value=(today().replace(day=1), today()), max_value=today(), key="export_days")
+    gates = list_gates()
+    export_gates = st.multiselect("Gates", gates, default=gates, key="export_gates")
+    fmt = st.radio("Format", available_formats(), horizontal=True, key="export_format")
+    if fmt == "Excel":
+        st.caption("Excel is written a few thousand entries per second; for a whole year CSV or Parquet is much faster.")
+
+    if st.button("📦 Prepare export", key="prepare_export", disabled=not export_gates):
+        start_day, end_day = export_days if len(export_days) == 2 else (export_days[0], export_days[0])
+        extension, mime, _ = FORMATS[fmt]
+        file_name = f"gate_logs_{start_day}_{end_day}.{extension}"
+        with tempfile.TemporaryDirectory(prefix="gate-export-") as folder:
+            path = os.path.join(folder, file_name)
+            with st.spinner("Exporting..."):
+                rows = export_logs(path, fmt, sorted(export_gates), start_day, end_day)
+            with open(path, "rb") as f:
+                st.download_button(f"⬇️ Download {rows} entries ({fmt})", f, file_name=file_name, mime=mime, key="export_download")
@@ -0,0 +1,799 @@
+import os
+import sys
+import gzip
+import json
+import time
+import queue
+import struct
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytz  # For India timezone
+
+from metrics import timed, timer
+
+try:
+    import fcntl   # cross-process file locks (not available on Windows)
+except ImportError:
+    fcntl = None
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# ===== Setup internal folder for logs =====
+# vehicle_logs/gate{N}/YYYY-MM-DD.dat      entries of one IST day (today, and days not yet rotated)
+# vehicle_logs/gate{N}/YYYY-MM-DD.dat.gz   finished days, compressed
+# vehicle_logs/gate{N}/index.json          every day's partition with its entry count and time span
+log_folder = "vehicle_logs"
+os.makedirs(log_folder, exist_ok=True)
+
+# ===== Record layout =====
+# Every entry is one fixed-width little-endian record, so the n-th entry of a day
+# lives at n * RECORD.size and a partition can be read as numpy columns in one call.
+FIELDS = ("entry_no", "ts", "gate", "action", "vehicle_type", "number", "flat", "user")
+RECORD = struct.Struct("<IdH3s8s16s16s96s")
+RECORD_DTYPE = np.dtype([
+    ("entry_no", "<u4"),     # restarts at 1 every day
+    ("ts", "<f8"),           # seconds since epoch (UTC)
+    ("gate", "<u2"),
+    ("action", "S3"),
+    ("vehicle_type", "S8"),
+    ("number", "S16"),       # normalized vehicle number
+    ("flat", "S16"),
+    ("user", "S96"),         # the guards on duty, joined by GUARD_SEP
+])
+assert RECORD.size == RECORD_DTYPE.itemsize
+
+LogRecord = namedtuple("LogRecord", FIELDS)
+
+# One record per gate event, with every guard on duty in its user field (at most
+# five logged-in users, which fits the 96 bytes). Logs written before this have one
+# copy of the event per guard instead.
+GUARD_SEP = ", "
+
+
+def join_guards(names):
+    return GUARD_SEP.join(names)
+
+
+def split_guards(user):
+    return user.split(GUARD_SEP) if user else []
+
+
+# bytes available to each text field; longer values are rejected, never cut, so a
+# stored plate is always the plate that was looked up
+TEXT_WIDTHS = {name: RECORD_DTYPE[name].itemsize for name in ("action", "vehicle_type", "number", "flat", "user")}
+
+_lock = threading.Lock()
+_summaries = {}   # (gate, day) -> running vehicle-type counts, see summarize()
+
+
+def fits(field, text):
+    return len(str(text).encode("utf-8")) <= TEXT_WIDTHS[field]
+
+
+def check_fields(**fields):
+    # ValueError naming the first value too long for its field
+    for field, text in fields.items():
+        if not fits(field, text):
+            raise ValueError(f"{field.replace('_', ' ')} {text!r} is longer than {TEXT_WIDTHS[field]} characters")
+
+
+def _pack_text(text, width):
+    data = str(text).encode("utf-8")
+    if len(data) > width:
+        raise ValueError(f"{text!r} is longer than {width} bytes")
+    return data
+
+
+def _clip_text(text, width):
+    # only for logs from before the width check: cut, but never a multi-byte character in half
+    return str(text).encode("utf-8")[:width].decode("utf-8", "ignore")
+
+
+def _unpack_text(data):
+    return data.rstrip(b"\0").decode("utf-8", "ignore")
+
+
+def _to_record(values):
+    entry_no, ts, gate, action, vehicle_type, number, flat, user = values
+    return LogRecord(int(entry_no), float(ts), int(gate), _unpack_text(action), _unpack_text(vehicle_type),
+                     _unpack_text(number), _unpack_text(flat), _unpack_text(user))
+
+
+def _from_bytes(data):
+    # a torn last record (crash mid-write) is ignored
+    return np.frombuffer(data[:len(data) - len(data) % RECORD.size], dtype=RECORD_DTYPE)
+
+
+# ===== Days and paths =====
+def today():
+    return datetime.now(IST).date()
+
+
+def day_of(ts):
+    return datetime.fromtimestamp(ts, IST).date()
+
+
+def get_gate_folder(gate):
+    folder = os.path.join(log_folder, f"gate{gate}")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def list_gates():
+    # every gate that has a log (old text/.dat logs included), so adding a gate
+    # needs no code changes
+    gates = set()
+    for name in os.listdir(log_folder):
+        stem, _, suffix = name.partition(".")
+        if stem.startswith("gate") and stem[4:].isdigit() and not suffix:
+            gates.add(int(stem[4:]))
+        elif stem.startswith("vehicle_log_gate") and stem[16:].isdigit() and suffix in ("txt", "dat"):
+            gates.add(int(stem[16:]))
+    return sorted(gates)
+
+
+def get_log_file(gate, day=None):
+    return os.path.join(get_gate_folder(gate), f"{(day or today()).isoformat()}.dat")
+
+
+def get_summary_file(gate, day=None):
+    return os.path.join(get_gate_folder(gate), f"{(day or today()).isoformat()}.summary.json")
+
+
+def get_index_file(gate):
+    return os.path.join(get_gate_folder(gate), "index.json")
+
+
+def get_legacy_log_file(gate):
+    return os.path.join(log_folder, f"vehicle_log_gate{gate}.txt")
+
+
+def get_unpartitioned_log_file(gate):
+    return os.path.join(log_folder, f"vehicle_log_gate{gate}.dat")
+
+
+def _write_json(path, data):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+
+# ===== Locks =====
+@contextmanager
+def _file_lock(f):
+    # several app processes may share one log folder; the in-process _lock only
+    # orders threads, this orders processes
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+_held = threading.local()
+
+
+@contextmanager
+def _gate_lock(gate):
+    # guards a gate's index.json, rotation and migration across processes;
+    # re-entrant within a thread (flock on a second descriptor would wait on itself)
+    held = _held.__dict__.setdefault("gates", set())
+    if gate in held:
+        yield
+        return
+    with open(os.path.join(get_gate_folder(gate), ".lock"), "a") as f, _file_lock(f):
+        held.add(gate)
+        try:
+            yield
+        finally:
+            held.discard(gate)
+
+
+# ===== Partition index =====
+# index.json: {"YYYY-MM-DD": {"compressed": bool, "entries": n, "first_ts": t, "last_ts": t}}.
+# Counts and time spans are filled in when a day is rotated. Without an index
+# (deleted, or an older folder) it is rebuilt from the directory listing.
+_indexes = {}   # gate -> (index.json mtime, index)
+
+
+def _scan_partitions(gate):
+    index = {}
+    for name in os.listdir(get_gate_folder(gate)):
+        day, _, suffix = name.partition(".")
+        if suffix not in ("dat", "dat.gz"):
+            continue
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            continue
+        if suffix == "dat.gz" or day not in index:
+            index[day] = {"compressed": suffix == "dat.gz"}
+    return index
+
+
+def load_index(gate):
+    index_file = get_index_file(gate)
+    try:
+        mtime = os.stat(index_file).st_mtime_ns
+    except OSError:
+        return _scan_partitions(gate)
+    cached = _indexes.get(gate)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return _scan_partitions(gate)
+    _indexes[gate] = (mtime, index)
+    return index
+
+
+def _save_index(gate, index):
+    _write_json(get_index_file(gate), index)
+    _indexes[gate] = (os.stat(get_index_file(gate)).st_mtime_ns, index)
+
+
+def _register_day(gate, day):
+    if day.isoformat() in load_index(gate):
+        return
+    with _gate_lock(gate):
+        index = dict(load_index(gate))
+        index.setdefault(day.isoformat(), {"compressed": False})
+        _save_index(gate, index)
+
+
+def log_days(gate, start=None, end=None):
+    # days between start and end (inclusive) that have a partition, oldest first
+    start = start.isoformat() if start else ""
+    end = end.isoformat() if end else "9999"
+    return [date.fromisoformat(day) for day in sorted(load_index(gate)) if start <= day <= end]
+
+
+# ===== Rotation =====
+# Finished days are gzipped (written to a temp file and renamed) and their entry
+# count and time span go into the index. The writer rotates on its first commit of
+# a new IST day; `python gate_log.py rotate` does the same from cron.
+_rotated_on = {}   # gate -> day rotation last ran in this process
+
+
+def _read_archive(path):
+    try:
+        with gzip.open(path, "rb") as f:
+            return _from_bytes(f.read())
+    except FileNotFoundError:
+        return np.empty(0, dtype=RECORD_DTYPE)
+
+
+def rotate(gate):
+    current = today().isoformat()
+    with _gate_lock(gate):
+        index = {**_scan_partitions(gate), **load_index(gate)}
+        for day, info in sorted(index.items()):
+            log_file = get_log_file(gate, date.fromisoformat(day))
+            if day >= current or not os.path.exists(log_file):
+                continue
+            with open(log_file, "rb") as f, _file_lock(f):
+                # a late append after an earlier rotation is merged into the archive
+                records = np.concatenate((_read_archive(log_file + ".gz"), _from_bytes(f.read())))
+                with gzip.open(log_file + ".gz.tmp", "wb") as archive:
+                    archive.write(records.tobytes())
+                os.replace(log_file + ".gz.tmp", log_file + ".gz")
+                os.remove(log_file)
+            summary_file = get_summary_file(gate, date.fromisoformat(day))
+            if os.path.exists(summary_file):
+                os.remove(summary_file)
+            info = {"compressed": True, "entries": int(len(records))}
+            if len(records):
+                info.update(first_ts=float(records["ts"][0]), last_ts=float(records["ts"][-1]))
+            index[day] = info
+        _save_index(gate, index)
+    _rotated_on[gate] = current
+
+
+def _rotate_if_new_day(gate):
+    if _rotated_on.get(gate) != today().isoformat():
+        rotate(gate)
+
+
+# ===== Writing =====
+def _last_entry(f, size):
+    # (entry_no, ts) of the last record, (0, 0.0) for an empty file
+    if size < RECORD.size:
+        return 0, 0.0
+    f.seek(size - RECORD.size)
+    return RECORD.unpack(f.read(RECORD.size))[:2]
+
+
+def _write_day(gate, day, rows, sync=False):
+    # rows of one day; numbering continues from that day's last record and is
+    # assigned while the file is locked. Timestamps are stamped before the lock, so
+    # two sessions or processes can arrive out of order: each ts is raised to at
+    # least the one before it, which keeps every day file sorted by time (the
+    # timeline's merge and its page cursors rely on that). Returns (byte offset
+    # written at, records).
+    _register_day(gate, day)
+    written = []
+    with open(get_log_file(gate, day), "ab+") as f, _file_lock(f):
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size % RECORD.size:
+            # a crash left half a record at the end; drop it so records stay aligned
+            size -= size % RECORD.size
+            f.truncate(size)
+        entry_no, last_ts = _last_entry(f, size)
+        chunks = []
+        for ts, action, vehicle_type, number, flat, user in rows:
+            entry_no += 1
+            last_ts = max(float(ts), last_ts)
+            record = LogRecord(entry_no, last_ts, int(gate), action, vehicle_type, number, flat, user)
+            chunks.append(RECORD.pack(
+                record.entry_no, record.ts, record.gate,
+                _pack_text(action, 3), _pack_text(vehicle_type, 8), _pack_text(number, 16),
+                _pack_text(flat, 16), _pack_text(user, 96),
+            ))
+            written.append(record)
+        f.seek(0, os.SEEK_END)
+        f.write(b"".join(chunks))
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+    return size, written
+
+
+def _write_records(gate, rows, sync=False):
+    # rows: (ts, action, vehicle_type, number, flat, user), each written to the
+    # partition of its IST day. Returns the LogRecords in the order of `rows`.
+    by_day = {}
+    for i, row in enumerate(rows):
+        by_day.setdefault(day_of(row[0]), []).append(i)
+    written = [None] * len(rows)
+    for day, positions in sorted(by_day.items()):
+        offset, records = _write_day(gate, day, [rows[i] for i in positions], sync)
+        _add_to_summary(gate, day, offset, records)
+        for i, record in zip(positions, records):
+            written[i] = record
+    return written
+
+
+# ===== Single writer =====
+# All appends in a process go through one background thread. Whatever is queued
+# when it wakes up (plus anything arriving within `linger` seconds) is written as
+# one batch per gate with a single fsync, so a burst of submits from several guard
+# sessions costs one disk flush instead of one each.
+class LogWriter:
+    def __init__(self, linger=0.002, max_batch=500):
+        self.linger = linger
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=2000)   # seconds from submit to durable
+        self.entries = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self.busy_time = 0.0
+        self._thread = threading.Thread(target=self._run, name="gate-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, gate, rows):
+        # Future resolving to the written LogRecords, in the order of `rows`
+        future = Future()
+        self._queue.put((gate, list(rows), future, time.perf_counter()))
+        return future
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.perf_counter(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            started = time.perf_counter()
+            by_gate = {}
+            for item in batch:
+                by_gate.setdefault(item[0], []).append(item)
+            for gate, items in by_gate.items():
+                self._commit(gate, items)
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self.batches += 1
+                self.fsyncs += len(by_gate)
+                self.busy_time += finished - started
+                for _, rows, _, submitted in batch:
+                    self.entries += len(rows)
+                    self._latencies.append(finished - submitted)
+
+    def _commit(self, gate, items):
+        rows = [row for _, item_rows, _, _ in items for row in item_rows]
+        try:
+            with _lock:
+                _migrate_if_needed(gate)
+                _rotate_if_new_day(gate)
+                with timer("log_commit"):
+                    records = _write_records(gate, rows, sync=True)
+        except BaseException as e:
+            for _, _, future, _ in items:
+                future.set_exception(e)
+            return
+        start = 0
+        for _, item_rows, future, _ in items:
+            future.set_result(records[start:start + len(item_rows)])
+            start += len(item_rows)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+            return {
+                "entries": self.entries,
+                "batches": self.batches,
+                "fsyncs": self.fsyncs,
+                "entries_per_sec": self.entries / self.busy_time if self.busy_time else 0.0,
+                "latency_ms_p50": pick(0.50),
+                "latency_ms_p95": pick(0.95),
+                "latency_ms_p99": pick(0.99),
+                "queued": self._queue.qsize(),
+            }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter()
+        return _writer
+
+
+@timed("log_append")
+def append_records(gate, rows, timeout=30):
+    # rows: (user, vehicle_type, number, flat, action) -> written LogRecords. Values
+    # too long for their field raise ValueError here, before anything is queued.
+    for user, vehicle_type, number, flat, action in rows:
+        check_fields(user=user, vehicle_type=vehicle_type, number=number, flat=flat, action=action)
+    ts = datetime.now(IST).timestamp()
+    rows = [(ts, action, vehicle_type, number, flat, user) for user, vehicle_type, number, flat, action in rows]
+    return get_writer().submit(gate, rows).result(timeout)
+
+
+def append_record(gate, user, vehicle_type, number, flat, action):
+    return append_records(gate, [(user, vehicle_type, number, flat, action)])[0]
+
+
+def clear_log(gate):
+    # only today's entries; earlier days stay in their partitions
+    day = today()
+    with _lock:
+        _migrate_if_needed(gate)
+        with open(get_log_file(gate, day), "ab") as f, _file_lock(f):
+            f.truncate(0)
+        _summaries.pop((gate, day), None)
+        if os.path.exists(get_summary_file(gate, day)):
+            os.remove(get_summary_file(gate, day))
+
+
+# ===== Reading =====
+def _read_day(gate, day):
+    log_file = get_log_file(gate, day)
+    try:
+        with open(log_file, "rb") as f:
+            return _from_bytes(f.read())
+    except FileNotFoundError:
+        return _read_archive(log_file + ".gz")
+
+
+def read_day_tail(gate, day, start=0):
+    # (records of one day from entry index `start` on, total entries that day).
+    # For an open day only the bytes after `start` are read.
+    log_file = get_log_file(gate, day)
+    try:
+        with open(log_file, "rb") as f:
+            total = os.fstat(f.fileno()).st_size // RECORD.size
+            f.seek(min(start, total) * RECORD.size)
+            return _from_bytes(f.read((total - min(start, total)) * RECORD.size)), total
+    except FileNotFoundError:
+        records = _read_archive(log_file + ".gz")
+        return records[start:], len(records)
+
+
+@timed("read_columns")
+def read_columns(gate, start=None, end=None):
+    # numpy structured array, one column per field, for the days start..end
+    # (default: today only). Partitions outside that range are never opened.
+    ensure_migrated(gate)
+    start = start or today()
+    parts = [_read_day(gate, day) for day in log_days(gate, start, end or start)]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD_DTYPE)
+
+
+def records_from_rows(records):
+    # numpy structured array -> [LogRecord]
+    return [_to_record(row) for row in records.tolist()]
+
+
+def iter_day_blocks(gate, start=None, end=None, block=1024):
+    # the records of days start..end as structured arrays of up to `block` records,
+    # read as a stream (archived days are decompressed as they are read)
+    for day in log_days(gate, start, end):
+        log_file = get_log_file(gate, day)
+        try:
+            f = open(log_file, "rb")
+        except FileNotFoundError:
+            try:
+                f = gzip.open(log_file + ".gz", "rb")
+            except FileNotFoundError:
+                continue
+        with f:
+            rest = b""
+            while True:
+                data = f.read(block * RECORD.size)
+                if not data:
+                    break
+                data = rest + data
+                cut = len(data) - len(data) % RECORD.size
+                rest = data[cut:]
+                yield _from_bytes(data[:cut])
+
+
+def read_records(gate, start=None, end=None):
+    return records_from_rows(read_columns(gate, start, end))
+
+
+def format_time(ts):
+    return datetime.fromtimestamp(ts, IST).strftime("%I:%M:%S %p")
+
+
+def format_record(record):
+    return (
+        f"Entry No.{record.entry_no} | "
+        f"🚪 Gate {record.gate} | "
+        f"👤 User: {record.user} | "
+        f"🚘 Vehicle: {record.vehicle_type} | "
+        f"🔢 Number: {record.number} | "
+        f"🏠 Flat: {record.flat} | "
+        f"📍 Action: {record.action} | "
+        f"⏰ Time: {format_time(record.ts)}\n"
+    )
+
+
+@timed("read_log")
+def read_log_page(gate, page=0, page_size=50, day=None):
+    # Page 0 is the newest `page_size` entries of the day (default today), page 1
+    # the ones before, ... For an open day only that slice of the file is read.
+    # Returns (records newest first, total entries that day).
+    ensure_migrated(gate)
+    log_file = get_log_file(gate, day)
+    if os.path.exists(log_file):
+        with open(log_file, "rb") as f:
+            total = os.fstat(f.fileno()).st_size // RECORD.size
+            stop = max(total - page * page_size, 0)
+            start = max(stop - page_size, 0)
+            f.seek(start * RECORD.size)
+            records = np.frombuffer(f.read((stop - start) * RECORD.size), dtype=RECORD_DTYPE)
+    else:
+        # archived day: decompressed as a whole (one day is small)
+        records = _read_archive(log_file + ".gz")
+        total = len(records)
+        stop = max(total - page * page_size, 0)
+        records = records[max(stop - page_size, 0):stop]
+    return [_to_record(row) for row in reversed(records.tolist())], total
+
+
+def records_to_frame(records):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Entry No.": [r.entry_no for r in records],
+        "Gate": [r.gate for r in records],
+        "User": [r.user for r in records],
+        "Vehicle": [r.vehicle_type for r in records],
+        "Number": [r.number for r in records],
+        "Flat": [r.flat for r in records],
+        "Action": [r.action for r in records],
+        "Time": [format_time(r.ts) for r in records],
+    })
+
+
+# ===== Running summary =====
+# Per gate and day we keep {"offset", "first_ts", "counts"}: vehicle-type IN/OUT
+# counts for everything up to byte `offset` of that day's log. Appends from this
+# process bump it in place; summarize() only parses records written after the
+# checkpoint (e.g. by another process) and saves the checkpoint next to the log.
+def _count_by_type(records, counts):
+    if not len(records):
+        return
+    types, first_seen, type_index = np.unique(records["vehicle_type"], return_index=True, return_inverse=True)
+    ins = np.bincount(type_index, weights=records["action"] == b"IN", minlength=len(types))
+    outs = np.bincount(type_index, weights=records["action"] == b"OUT", minlength=len(types))
+    for i in np.argsort(first_seen):
+        type_counts = counts.setdefault(_unpack_text(types[i]), {"IN": 0, "OUT": 0})
+        type_counts["IN"] += int(ins[i])
+        type_counts["OUT"] += int(outs[i])
+
+
+def _add_to_summary(gate, day, offset, records):
+    state = _summaries.get((gate, day))
+    if state is None or not records:
+        return
+    if state["offset"] != offset:
+        return   # someone else wrote in between; summarize() will catch up from the file
+    for record in records:
+        type_counts = state["counts"].setdefault(record.vehicle_type, {"IN": 0, "OUT": 0})
+        if record.action in type_counts:
+            type_counts[record.action] += 1
+        if state["first_ts"] is None:
+            state["first_ts"] = record.ts
+    state["offset"] += len(records) * RECORD.size
+
+
+def _load_summary(gate, day):
+    try:
+        with open(get_summary_file(gate, day), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if {"offset", "first_ts", "counts"} <= state.keys():
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"offset": 0, "first_ts": None, "counts": {}}
+
+
+@timed("summary")
+def summarize(gate, day=None):
+    # {vehicle_type: {"IN": n, "OUT": n}} for one day (default today), in order of first appearance
+    day = day or today()
+    with _lock:
+        _migrate_if_needed(gate)
+        log_file = get_log_file(gate, day)
+        if not os.path.exists(log_file):
+            # archived (or empty) day: it no longer changes, count it in one pass
+            counts = {}
+            _count_by_type(_read_archive(log_file + ".gz"), counts)
+            return counts
+        state = _summaries.get((gate, day)) or _load_summary(gate, day)
+        with open(log_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            size -= size % RECORD.size
+            first_ts = RECORD.unpack(f.read(RECORD.size))[1] if size else None
+            if size < state["offset"] or (state["first_ts"] is not None and state["first_ts"] != first_ts):
+                # log was cleared or replaced behind our back
+                state = {"offset": 0, "first_ts": None, "counts": {}}
+            if size > state["offset"]:
+                f.seek(state["offset"])
+                _count_by_type(np.frombuffer(f.read(size - state["offset"]), dtype=RECORD_DTYPE), state["counts"])
+                state["offset"] = size
+                state["first_ts"] = first_ts
+                _write_json(get_summary_file(gate, day), state)
+        _summaries[(gate, day)] = state
+        return {vehicle_type: dict(counts) for vehicle_type, counts in state["counts"].items()}
+
+
+# ===== Migration from older log formats =====
+# vehicle_log_gate{N}.txt (emoji text lines) and vehicle_log_gate{N}.dat (one
+# binary file for every day) are split into day partitions once and renamed to
+# *.migrated. Entry numbers are reassigned per day.
+def _parse_legacy_line(line):
+    # "Entry No.5 | 🚪 Gate 1 | 👤 User: Naveen | ... | ⏰ Time: 09:15:02 AM"
+    parts = [part.strip() for part in line.strip().split(" | ")]
+    if len(parts) < 8 or not parts[0].startswith("Entry No."):
+        return None
+    values = {}
+    for part in parts[2:]:
+        label, _, value = part.partition(":")
+        values[label.split(" ")[-1]] = value.strip()
+    try:
+        clock = datetime.strptime(values["Time"], "%I:%M:%S %p").time()
+    except (KeyError, ValueError):
+        return None
+    return clock, values.get("Action", ""), values.get("Vehicle", ""), values.get("Number", ""), \
+        values.get("Flat", ""), values.get("User", "")
+
+
+def migrate_text_log(gate):
+    # The text log only kept the time of day. Dates are rebuilt backwards from the
+    # file's modification date, stepping one day back whenever the clock jumps forward.
+    legacy_file = get_legacy_log_file(gate)
+    if not os.path.exists(legacy_file):
+        return 0
+    with open(legacy_file, "r", encoding="utf-8") as f:
+        parsed = [p for p in (_parse_legacy_line(line) for line in f) if p]
+
+    day = datetime.fromtimestamp(os.path.getmtime(legacy_file), IST).date()
+    rows = []
+    later_clock = None
+    for clock, action, vehicle_type, number, flat, user in reversed(parsed):
+        if later_clock is not None and clock > later_clock:
+            day -= timedelta(days=1)
+        later_clock = clock
+        ts = IST.localize(datetime.combine(day, clock)).timestamp()
+        rows.append((ts, action, vehicle_type, number, flat, user))
+    rows.reverse()
+    # the text log had no field limits; such values were always cut when stored
+    widths = [TEXT_WIDTHS[name] for name in ("action", "vehicle_type", "number", "flat", "user")]
+    rows = [(row[0],) + tuple(_clip_text(text, width) for text, width in zip(row[1:], widths)) for row in rows]
+
+    _write_records(gate, rows)
+    os.replace(legacy_file, legacy_file + ".migrated")
+    return len(rows)
+
+
+def migrate_unpartitioned_log(gate):
+    old_file = get_unpartitioned_log_file(gate)
+    if not os.path.exists(old_file):
+        return 0
+    with open(old_file, "rb") as f:
+        records = [_to_record(row) for row in _from_bytes(f.read()).tolist()]
+    _write_records(gate, [(r.ts, r.action, r.vehicle_type, r.number, r.flat, r.user) for r in records])
+    os.replace(old_file, old_file + ".migrated")
+    return len(records)
+
+
+def _migrate_gate(gate):
+    with _gate_lock(gate):
+        count = migrate_text_log(gate) + migrate_unpartitioned_log(gate)
+    rotate(gate)
+    return count
+
+
+_checked = set()   # gates already looked at for old-format logs in this process
+
+
+def _migrate_if_needed(gate):
+    if gate in _checked:
+        return
+    if os.path.exists(get_legacy_log_file(gate)) or os.path.exists(get_unpartitioned_log_file(gate)):
+        _migrate_gate(gate)
+    _checked.add(gate)
+
+
+def ensure_migrated(gate):
+    # for readers outside this module: old-format logs of the gate are converted first
+    with _lock:
+        _migrate_if_needed(gate)
+
+
+def migrate_all():
+    migrated = {}
+    with _lock:
+        for name in sorted(os.listdir(log_folder)):
+            stem, _, suffix = name.partition(".")
+            if stem.startswith("vehicle_log_gate") and suffix in ("txt", "dat"):
+                gate = int(stem[len("vehicle_log_gate"):])
+                migrated[gate] = migrated.get(gate, 0) + _migrate_gate(gate)
+                _checked.add(gate)
+    return migrated
+
+
+def rotate_all():
+    gates = [int(name[4:]) for name in sorted(os.listdir(log_folder)) if name.startswith("gate") and name[4:].isdigit()]
+    for gate in gates:
+        rotate(gate)
+    return gates
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        for gate, count in migrate_all().items():
+            print(f"Gate {gate}: {count} entries migrated")
+    elif sys.argv[1:] == ["rotate"]:
+        for gate in rotate_all():
+            print(f"Gate {gate}: rotated")
+    else:
+        print("usage: python gate_log.py migrate|rotate")
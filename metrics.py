@@ -0,0 +1,276 @@
+import os
+import time
+import atexit
+import threading
+from collections import deque
+from functools import wraps
+
+import numpy as np
+
+# ===== Timing hooks =====
+# @timed("name") / with timer("name") record how long the hot paths take into
+# in-process histograms (fixed buckets, Prometheus style). A call only appends its
+# duration to a list (atomic, no lock); the list is sorted into buckets in bulk when
+# it gets long or the numbers are read. That keeps the cost around a quarter of a
+# microsecond. Calls slower than SLOW_CALL also note the wall-clock time, so the
+# diagnostics panel can say when things were slow. GATE_METRICS=0 turns it off,
+# in which case @timed returns the function unchanged.
+ENABLED = os.environ.get("GATE_METRICS", "1") != "0"
+
+# upper bounds in seconds, 0.1 ms .. 30 s
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SLOW_CALL = 0.1   # seconds
+SLOW_KEPT = 50    # latest slow calls kept per histogram
+FOLD_AT = 4096    # pending durations that trigger bucketing
+
+DUMP_INTERVAL = 15   # seconds between metrics file dumps
+
+
+class Histogram:
+    def __init__(self, name):
+        self.name = name
+        self.counts = np.zeros(len(BUCKETS) + 1, dtype=np.int64)   # last bucket is +Inf
+        self.sum = 0.0
+        self.pending = []   # durations not bucketed yet; always the same list object
+        self.slow_calls = deque(maxlen=SLOW_KEPT)   # (wall clock, seconds)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        self.pending.append(seconds)
+        if seconds >= SLOW_CALL or len(self.pending) >= FOLD_AT:
+            self.note(seconds)
+
+    def note(self, seconds):
+        if seconds >= SLOW_CALL:
+            self.slow_calls.append((time.time(), seconds))
+        if len(self.pending) >= FOLD_AT:
+            self.fold()
+
+    def fold(self):
+        # Moves pending durations into the buckets. Appends racing with this land
+        # after the first n items, so deleting exactly those loses nothing.
+        with self._lock:
+            n = len(self.pending)
+            values = np.array(self.pending[:n], dtype=np.float64)
+            del self.pending[:n]
+            self.counts += np.bincount(np.searchsorted(BUCKETS, values), minlength=len(self.counts))
+            self.sum += float(values.sum())
+            return self.counts.copy(), self.sum
+
+    @property
+    def count(self):
+        return int(self.fold()[0].sum())
+
+    def quantile(self, q):
+        # estimated from the buckets, interpolating inside the one that holds q
+        counts = self.fold()[0].tolist()
+        count = sum(counts)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if seen + n >= rank and n:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name):
+    found = _histograms.get(name)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(name, Histogram(name))
+    return found
+
+
+def observe(name, seconds):
+    if ENABLED:
+        histogram(name).observe(seconds)
+
+
+def timed(name):
+    def decorate(func):
+        if not ENABLED:
+            return func
+        hist = histogram(name)
+        pending, note, clock = hist.pending, hist.note, time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - started
+                pending.append(elapsed)
+                if elapsed >= SLOW_CALL or len(pending) >= FOLD_AT:
+                    note(elapsed)
+        return wrapper
+    return decorate
+
+
+class timer:
+    # with timer("name"): ...
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+
+
+# ===== Reading the numbers =====
+def snapshot():
+    # one row per histogram, for the diagnostics panel
+    rows = []
+    for name in sorted(_histograms):
+        hist = _histograms[name]
+        counts, total = hist.fold()
+        count = int(counts.sum())
+        if not count:
+            continue
+        slow = list(hist.slow_calls)
+        rows.append({
+            "Operation": name,
+            "Calls": count,
+            "Mean ms": round(total / count * 1000, 2),
+            "p50 ms": round(hist.quantile(0.50) * 1000, 2),
+            "p95 ms": round(hist.quantile(0.95) * 1000, 2),
+            "p99 ms": round(hist.quantile(0.99) * 1000, 2),
+            f"Calls over {SLOW_CALL * 1000:.0f} ms": len(slow),
+            "Last slow call": time.strftime("%d-%m %H:%M:%S", time.localtime(slow[-1][0])) if slow else "",
+        })
+    return rows
+
+
+def render_prometheus():
+    lines = []
+    for name in sorted(_histograms):
+        hist = _histograms[name]
+        counts, total = hist.fold()
+        count = int(counts.sum())
+        metric = f"gate_{name}_seconds"
+        lines.append(f"# HELP {metric} Time spent in {name}.")
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), counts.tolist()):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{metric}_sum {total}")
+        lines.append(f"{metric}_count {count}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    # atomic, so a node_exporter textfile collector never reads half a file
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_file, path)
+
+
+# ===== Exporting =====
+# A background thread dumps the metrics file every DUMP_INTERVAL seconds
+# (GATE_METRICS_FILE, default vehicle_logs/metrics-<pid>.prom, one per app
+# process). The file is removed when the process exits, and files left behind by
+# processes that are gone (killed, crashed) are removed on the next start. With
+# GATE_METRICS_PORT set, the same text is also served over HTTP at /metrics.
+_exporting = False
+_export_lock = threading.Lock()
+
+
+def start_exporting(folder="vehicle_logs"):
+    global _exporting
+    if not ENABLED:
+        return
+    with _export_lock:
+        if _exporting:
+            return
+        _exporting = True
+    path = os.environ.get("GATE_METRICS_FILE")
+    if not path:
+        _remove_stale_dumps(folder)
+        path = os.path.join(folder, f"metrics-{os.getpid()}.prom")
+    stopped = threading.Event()
+
+    def dump_forever():
+        while True:
+            time.sleep(DUMP_INTERVAL)
+            with _export_lock:   # never dumps again once the exit cleanup ran
+                if stopped.is_set():
+                    return
+                try:
+                    dump(path)
+                except OSError:
+                    pass
+
+    def remove_at_exit():
+        with _export_lock:
+            stopped.set()
+            _remove_dump(path)
+    atexit.register(remove_at_exit)
+    threading.Thread(target=dump_forever, name="metrics-dump", daemon=True).start()
+
+    port = os.environ.get("GATE_METRICS_PORT")
+    if port:
+        _serve_http(int(port))
+
+
+def _remove_dump(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_stale_dumps(folder):
+    # metrics-<pid>.prom of processes that no longer run
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return
+    for name in names:
+        pid = name[len("metrics-"):-len(".prom")]
+        if not (name.startswith("metrics-") and name.endswith(".prom") and pid.isdigit()):
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            _remove_dump(os.path.join(folder, name))
+        except OSError:
+            pass   # running, under another user
+
+
+def _serve_http(port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    except OSError:
+        return   # another app process already serves this port
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
@@ -0,0 +1,188 @@
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+# ===== Partial / fuzzy plate search =====
+# Everything is indexed on a "canonical" plate where characters guards commonly
+# mix up are folded together (O/0 is already folded by normalize_vehicle_input).
+CONFUSABLE = str.maketrans({"O": "0", "I": "1", "B": "8", "S": "5"})
+
+SUFFIX_LENGTHS = range(2, 7)   # "last 4 digits" style queries
+NGRAM = 3                      # substring queries of 3+ characters
+
+# Match kinds, best first
+EXACT, CONFUSABLE_MATCH, ONE_EDIT, SUFFIX, SUBSTRING = "exact", "confusable", "one edit", "suffix", "substring"
+_RANK = {EXACT: 0, CONFUSABLE_MATCH: 1, ONE_EDIT: 2, SUFFIX: 3, SUBSTRING: 4}
+
+
+def canonical_plate(plate):
+    return plate.translate(CONFUSABLE)
+
+
+def _deletions(text):
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+# one key space for the three tables, told apart by a prefix
+_DELETION, _SUFFIX, _NGRAM = "d:", "s:", "n:"
+
+
+def _keys(canon):
+    keys = {_DELETION + canon}
+    keys.update(_DELETION + key for key in _deletions(canon))
+    keys.update(_SUFFIX + canon[-n:] for n in SUFFIX_LENGTHS if n <= len(canon))
+    keys.update(_NGRAM + canon[i:i + NGRAM] for i in range(len(canon) - NGRAM + 1))
+    return keys
+
+
+def _within_one_edit(a, b):
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class PlateIndex:
+    # Built once with the registry. Lookups only touch hashed keys: a suffix table,
+    # a trigram inverted index for substrings and a deletion-neighbourhood table
+    # (every plate with one character removed, and the plate itself) that answers
+    # exact, confusable and edit-distance-1 queries without comparing against every
+    # plate.
+    #
+    # All three tables are one sorted pair of numpy arrays, (hash of key, plate id),
+    # about 12 bytes per key instead of a Python set per key. Plates added later go
+    # to a small dict until FOLD_AT keys pile up; removed plates are only marked
+    # dead and dropped at the next fold. Keys are hashed, so every candidate is
+    # checked against the query before it is offered.
+    FOLD_AT = 100000
+
+    def __init__(self, plates=()):
+        self.plates = []      # plate id -> plate, None once removed
+        self.ids = {}         # plate -> plate id
+        self.key_hashes = np.empty(0, dtype=np.int64)
+        self.key_ids = np.empty(0, dtype=np.int32)
+        self.recent = defaultdict(list)   # key hash -> ids of plates added since the last fold
+        self.recent_keys = 0
+        self.dead = 0
+        hashes, ids = array("q"), array("i")
+        for plate in plates:
+            if plate and plate not in self.ids:
+                plate_id = self._new_id(plate)
+                for key in _keys(canonical_plate(plate)):
+                    hashes.append(hash(key))
+                    ids.append(plate_id)
+        self._fold(np.frombuffer(hashes, dtype=np.int64), np.frombuffer(ids, dtype=np.int32))
+
+    def _new_id(self, plate):
+        self.ids[plate] = len(self.plates)
+        self.plates.append(plate)
+        return self.ids[plate]
+
+    def _fold(self, hashes=None, ids=None):
+        # merge the recent keys into the arrays and drop the keys of removed plates
+        if hashes is None:
+            pairs = [(h, plate_id) for h, plate_ids in self.recent.items() for plate_id in plate_ids]
+            hashes = np.array([h for h, _ in pairs], dtype=np.int64)
+            ids = np.array([plate_id for _, plate_id in pairs], dtype=np.int32)
+        if len(self.key_hashes):
+            hashes = np.concatenate([self.key_hashes, hashes])
+            ids = np.concatenate([self.key_ids, ids])
+        if self.dead:
+            alive = np.array([plate is not None for plate in self.plates])
+            keep = alive[ids]
+            hashes, ids = hashes[keep], ids[keep]
+        order = np.argsort(hashes, kind="stable")
+        self.key_hashes, self.key_ids = hashes[order], ids[order]
+        self.recent.clear()
+        self.recent_keys = self.dead = 0
+
+    def add(self, plate):
+        if not plate or plate in self.ids:
+            return
+        plate_id = self._new_id(plate)
+        for key in _keys(canonical_plate(plate)):
+            self.recent[hash(key)].append(plate_id)
+            self.recent_keys += 1
+        if self.recent_keys >= self.FOLD_AT:
+            self._fold()
+
+    def remove(self, plate):
+        plate_id = self.ids.pop(plate, None)
+        if plate_id is None:
+            return
+        self.plates[plate_id] = None
+        self.dead += 1
+        if self.dead * 20 >= self.FOLD_AT:
+            self._fold()
+
+    def _postings(self, keys):
+        # {key: sorted ids filed under it (or under a key with the same hash)}, all
+        # keys looked up in one pass over the arrays
+        hashes = np.array([hash(key) for key in keys], dtype=np.int64)
+        starts = self.key_hashes.searchsorted(hashes).tolist()
+        stops = self.key_hashes.searchsorted(hashes, side="right").tolist()
+        postings = {}
+        for key, h, lo, hi in zip(keys, hashes.tolist(), starts, stops):
+            # recent ids are newer than every folded one, so the run stays sorted
+            recent = self.recent.get(h)
+            postings[key] = np.concatenate([self.key_ids[lo:hi], recent]) if recent else self.key_ids[lo:hi]
+        return postings
+
+    def _plates(self, ids):
+        return [plate for plate in map(self.plates.__getitem__, ids.tolist()) if plate is not None]
+
+    def __contains__(self, plate):
+        return plate in self.ids
+
+    def search(self, query, limit=5):
+        # [(plate, match kind)], best matches first
+        if not query:
+            return []
+        canon = canonical_plate(query)
+        found = {}
+
+        def offer(plates, kind):
+            for plate in plates:
+                if _RANK[kind] < _RANK.get(found.get(plate), 99):
+                    found[plate] = kind
+
+        deletion_keys = [_DELETION + key for key in _deletions(canon)] if len(canon) >= 4 else []
+        ngram_keys = [_NGRAM + canon[i:i + NGRAM] for i in range(len(canon) - NGRAM + 1)]
+        postings = self._postings([_DELETION + canon, _SUFFIX + canon] + deletion_keys + ngram_keys)
+
+        near = self._plates(postings[_DELETION + canon])
+        exact = [p for p in near if canonical_plate(p) == canon]
+        offer((p for p in exact if p == query), EXACT)
+        offer(exact, CONFUSABLE_MATCH)
+
+        if deletion_keys:
+            neighbours = set(near)
+            for key in deletion_keys:
+                neighbours.update(self._plates(postings[key]))
+            offer((p for p in neighbours if _within_one_edit(canonical_plate(p), canon)), ONE_EDIT)
+
+        if len(canon) in SUFFIX_LENGTHS:
+            offer((p for p in self._plates(postings[_SUFFIX + canon]) if canonical_plate(p).endswith(canon)), SUFFIX)
+
+        if ngram_keys:
+            # intersect the trigram postings, rarest first, then check the few left
+            ordered = sorted((postings[key] for key in ngram_keys), key=len)
+            candidates = ordered[0]
+            for ids in ordered[1:]:
+                if len(candidates) <= 32:   # few enough to check directly
+                    break
+                at = np.minimum(ids.searchsorted(candidates), len(ids) - 1)
+                candidates = candidates[ids[at] == candidates] if len(ids) else ids
+            offer((p for p in self._plates(candidates) if canon in canonical_plate(p)), SUBSTRING)
+
+        ranked = sorted(found.items(), key=lambda item: (_RANK[item[1]], len(item[0]), item[0]))
+        return ranked[:limit]
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import threading
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+import gate_log
+from gate_log import day_of, format_time, list_gates, log_days, read_day_tail, today
+from metrics import timed
+from registry import normalize_vehicle_input
+
+# ===== Live presence table =====
+# The latest IN/OUT of every plate ever logged, kept in memory and updated in O(1)
+# per entry. "Inside" means the plate's latest event is an IN.
+#
+# A snapshot (vehicle_logs/presence.json) stores the table together with how far
+# into each gate's log it is: {gate: [day, entries]}. On startup the snapshot is
+# loaded and only the log written after it is replayed; without one, the whole log
+# is replayed once. Entries written by other app processes are picked up the same
+# way, by reading just the new tail of today's log.
+Presence = namedtuple("Presence", "number action gate flat vehicle_type ts")
+
+SNAPSHOT_EVERY = 30   # seconds between snapshot writes
+
+
+def get_snapshot_file():
+    return os.path.join(gate_log.log_folder, "presence.json")
+
+
+class PresenceTable:
+    def __init__(self):
+        self.latest = {}       # plate -> Presence
+        self.positions = {}    # gate -> (day, entries applied from that day's log)
+        self._lock = threading.RLock()
+        self._saved_at = 0.0
+        if not self._load_snapshot():
+            self.rebuild()
+
+    # ----- applying entries -----
+    def _apply(self, number, action, gate, flat, vehicle_type, ts):
+        last = self.latest.get(number)
+        if last is not None and last.ts > ts:
+            return   # an older entry arriving late does not change where the vehicle is
+        self.latest[number] = Presence(number, action, gate, flat, vehicle_type, ts)
+
+    def record(self, records):
+        # LogRecords just written by this process. Applied directly when they follow on
+        # from what the table has seen; otherwise someone else wrote in between and the
+        # tail of the log is read instead (which includes these records).
+        with self._lock:
+            for record in records:
+                day, entries = self.positions.get(record.gate, (None, 0))
+                if day != day_of(record.ts) or record.entry_no != entries + 1:
+                    self.catch_up()
+                    break
+                self._apply(record.number, record.action, record.gate, record.flat, record.vehicle_type, record.ts)
+                self.positions[record.gate] = (day, record.entry_no)
+            self._save_if_due()
+
+    def catch_up(self):
+        # replay whatever was logged since self.positions, in time order across gates
+        with self._lock:
+            new = []
+            for gate in list_gates():
+                day, entries = self.positions.get(gate, (None, 0))
+                for log_day in log_days(gate, day):
+                    records, total = read_day_tail(gate, log_day, entries if log_day == day else 0)
+                    if log_day == day and total < entries:
+                        # that day's log was cleared; the table no longer matches it
+                        self.rebuild()
+                        return
+                    new.append(records)
+                    self.positions[gate] = (log_day, total)
+            if new:
+                records = np.concatenate(new)
+                for record in gate_log.records_from_rows(records[np.argsort(records["ts"], kind="stable")]):
+                    self._apply_record(record)
+            self._save_if_due()
+
+    def _apply_record(self, record):
+        self._apply(record.number, record.action, record.gate, record.flat, record.vehicle_type, record.ts)
+
+    def rebuild(self):
+        # Replay the whole log: only the last entry of each plate matters, so the
+        # records are sorted by time and the last row per plate picked in numpy.
+        with self._lock:
+            self.latest, self.positions = {}, {}
+            parts = []
+            for gate in list_gates():
+                for day in log_days(gate):
+                    records, total = read_day_tail(gate, day)
+                    parts.append(records)
+                    self.positions[gate] = (day, total)
+            if parts:
+                records = np.concatenate(parts)
+                records = records[np.argsort(records["ts"], kind="stable")]
+                _, last = np.unique(records["number"][::-1], return_index=True)
+                for record in gate_log.records_from_rows(records[np.sort(len(records) - 1 - last)]):
+                    self._apply_record(record)
+            self.save()
+
+    # ----- questions asked at the gate -----
+    @timed("presence_check")
+    def check(self, vehicle_number, action):
+        # warning text when this IN/OUT does not fit the plate's last entry, else None
+        number = normalize_vehicle_input(vehicle_number)
+        with self._lock:
+            self.catch_up()
+            last = self.latest.get(number)
+        if action == "OUT" and last is None:
+            return f"⚠️ {number} ka koi IN entry nahi mila. OUT se pehle IN log nahi hua tha."
+        if action == "OUT" and last.action == "OUT":
+            return f"⚠️ {number} pehle hi {format_time(last.ts)} ({_day_text(last.ts)}) Gate {last.gate} se OUT ho chuki hai."
+        if action == "IN" and last is not None and last.action == "IN":
+            return f"⚠️ {number} pehle se andar hai: {format_time(last.ts)} ({_day_text(last.ts)}) Gate {last.gate} se IN hui thi."
+        return None
+
+    def status(self, vehicle_number):
+        with self._lock:
+            self.catch_up()
+            return self.latest.get(normalize_vehicle_input(vehicle_number))
+
+    def inside(self):
+        # Presence of every vehicle inside, most recent first
+        with self._lock:
+            self.catch_up()
+            return sorted((p for p in self.latest.values() if p.action == "IN"), key=lambda p: p.ts, reverse=True)
+
+    # ----- snapshot -----
+    def _save_if_due(self):
+        if time.time() - self._saved_at >= SNAPSHOT_EVERY:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = {
+                "positions": {str(gate): [day.isoformat(), entries] for gate, (day, entries) in self.positions.items()},
+                "latest": [list(p) for p in self.latest.values()],
+            }
+            snapshot_file = get_snapshot_file()
+            tmp_file = f"{snapshot_file}.{os.getpid()}.tmp"   # app processes may save at the same time
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, snapshot_file)
+            self._saved_at = time.time()
+
+    def _load_snapshot(self):
+        try:
+            with open(get_snapshot_file(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            positions = {int(gate): (date.fromisoformat(day), entries) for gate, (day, entries) in data["positions"].items()}
+            latest = {p[0]: Presence(*p) for p in data["latest"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.positions, self.latest = positions, latest
+        self._saved_at = time.time()
+        self.catch_up()
+        return True
+
+
+def _day_text(ts):
+    day = day_of(ts)
+    return "aaj" if day == today() else day.strftime("%d-%m-%Y")
+
+
+# One table per server process, shared by every session
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_presence():
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = PresenceTable()
+        return _table
+
+
+def presence_to_frame(entries):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Number": [p.number for p in entries],
+        "Flat": [p.flat for p in entries],
+        "Vehicle": [p.vehicle_type for p in entries],
+        "Gate": [p.gate for p in entries],
+        "Since": [f"{format_time(p.ts)} ({_day_text(p.ts)})" for p in entries],
+    })
@@ -0,0 +1,332 @@
+import os
+import re
+import csv
+import sys
+import hashlib
+import tempfile
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from metrics import timed
+from plate_index import PlateIndex
+
+# ===== Normalizers =====
+def normalize_vehicle_input(vehicle_number):
+    if pd.isna(vehicle_number) or vehicle_number == "":
+        return ""
+    text = str(vehicle_number).upper()
+    text = re.sub(r"\s+", "", text)
+    text = text.replace("O", "0")
+    return text.strip()
+
+
+def normalize_flat_input(flat_number):
+    if pd.isna(flat_number):
+        return ""
+    text = str(flat_number).upper()
+    text = re.sub(r"\s+", "", text)
+    if text.isnumeric():
+        text = "F" + text
+    return text.strip()
+
+
+# ===== Batch normalizers =====
+# Same output as the scalar functions above, for whole columns. Instead of a
+# re.sub per row, all values are joined with NUL and upper-cased/translated in
+# one C-level call, then split again. str.isspace() and the regex \s agree on
+# every code point, and the last whitespace character is U+3000.
+_WHITESPACE = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+_VEHICLE_TABLE = str.maketrans({**dict.fromkeys(_WHITESPACE), "O": "0"})
+_FLAT_TABLE = str.maketrans(dict.fromkeys(_WHITESPACE))
+
+
+def _batch_translate(values, table):
+    values = pd.Series(values)
+    strings = values.astype(str).tolist()
+    joined = "\0".join(strings)
+    if strings and joined.count("\0") == len(strings) - 1:
+        out = joined.upper().translate(table).split("\0")
+    else:
+        # a value contains the separator itself (or there are none): go one by one
+        out = [text.upper().translate(table) for text in strings]
+    return values, out
+
+
+def normalize_vehicle_series(values):
+    values, out = _batch_translate(values, _VEHICLE_TABLE)
+    out = pd.Series(out, index=values.index, dtype=object)
+    out[values.isna().to_numpy()] = ""
+    return out
+
+
+def normalize_flat_series(values):
+    values, out = _batch_translate(values, _FLAT_TABLE)
+    out = pd.Series([("F" + text) if text.isnumeric() else text for text in out], index=values.index, dtype=object)
+    out[values.isna().to_numpy()] = ""
+    return out
+
+
+# ===== Vehicle <-> flat registry =====
+RegistryDiff = namedtuple("RegistryDiff", "added changed removed")
+
+
+class VehicleRegistry:
+    def __init__(self, df):
+        self.vehicle_flat_pairs = dict(zip(df["Vehicle"], df["FlatNumber"]))
+        self.flat_to_vehicles = {}
+        for vehicle, flat in self.vehicle_flat_pairs.items():
+            self.flat_to_vehicles.setdefault(flat, []).append(vehicle)
+        self.flat_counts = {flat: len(vehicles) for flat, vehicles in self.flat_to_vehicles.items()}
+        self.search_index = PlateIndex(self.vehicle_flat_pairs)
+        self._lock = threading.RLock()   # searches vs. an import changing the maps
+
+    # ----- incremental changes -----
+    # Imports and CSV edits are applied to the live maps one plate at a time, so a
+    # running app never rebuilds the registry or the search index from scratch.
+    def set_flat(self, vehicle, flat):
+        with self._lock:
+            old = self.vehicle_flat_pairs.get(vehicle)
+            if old == flat:
+                return
+            if old is None:
+                self.search_index.add(vehicle)
+            else:
+                self._unlink(vehicle, old)
+            self.vehicle_flat_pairs[vehicle] = flat
+            self.flat_to_vehicles.setdefault(flat, []).append(vehicle)
+            self.flat_counts[flat] = len(self.flat_to_vehicles[flat])
+
+    def remove(self, vehicle):
+        with self._lock:
+            flat = self.vehicle_flat_pairs.pop(vehicle, None)
+            if flat is not None:
+                self._unlink(vehicle, flat)
+                self.search_index.remove(vehicle)
+
+    def _unlink(self, vehicle, flat):
+        vehicles = self.flat_to_vehicles[flat]
+        vehicles.remove(vehicle)
+        if vehicles:
+            self.flat_counts[flat] = len(vehicles)
+        else:
+            del self.flat_to_vehicles[flat], self.flat_counts[flat]
+
+    def apply(self, pairs, replace=False, changes=None):
+        # (vehicle, flat) pairs, already normalized, streamed in. Only plates that are
+        # new or moved flat are touched; with replace=True the pairs are the whole
+        # registry and plates missing from them are removed afterwards. A `changes`
+        # dict receives vehicle -> new flat (None when removed) for every plate touched.
+        changes = {} if changes is None else changes
+        added = changed = removed = 0
+        seen = set()
+        with self._lock:
+            for vehicle, flat in pairs:
+                if not vehicle:
+                    continue
+                if replace:
+                    seen.add(vehicle)
+                old = self.vehicle_flat_pairs.get(vehicle)
+                if old == flat:
+                    continue
+                if old is None:
+                    added += 1
+                else:
+                    changed += 1
+                self.set_flat(vehicle, flat)
+                changes[vehicle] = flat
+            if replace:
+                for vehicle in [v for v in self.vehicle_flat_pairs if v not in seen]:
+                    self.remove(vehicle)
+                    changes[vehicle] = None
+                    removed += 1
+        return RegistryDiff(added, changed, removed)
+
+    @timed("plate_search")
+    def find_vehicles(self, query, limit=5):
+        # partial / mistyped plate -> [(vehicle, flat, match kind)], best first
+        with self._lock:
+            matches = self.search_index.search(normalize_vehicle_input(query), limit)
+            return [(vehicle, self.vehicle_flat_pairs[vehicle], kind) for vehicle, kind in matches]
+
+
+# Read as text, so a flat column with a blank cell does not turn 706 into "706.0"
+# and the whole file and a chunk of it always parse the same way
+def read_registry_frame(path):
+    df = pd.read_csv(path, dtype=str)
+    if df.shape[1] < 2:
+        raise ValueError("CSV file must have at least 2 columns: Vehicle and FlatNumber")
+    df = df.iloc[:, :2]
+    df.columns = ["Vehicle", "FlatNumber"]
+    df["Vehicle"] = normalize_vehicle_series(df["Vehicle"])
+    df["FlatNumber"] = normalize_flat_series(df["FlatNumber"])
+    return df
+
+
+# ===== Clean-file build step =====
+# The normalized registry is written to the clean CSV only when the raw file's
+# content hash changes (the hash is kept in a .sha256 file next to it). The file
+# is written to a temp file and renamed, so readers never see half a CSV.
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, write):
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)   # mkstemp creates files private to the owner
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def build_clean_file(raw_file, clean_file):
+    # returns True when the clean file had to be (re)written
+    digest = file_sha256(raw_file)
+    hash_file = clean_file + ".sha256"
+    try:
+        with open(hash_file, "r") as f:
+            if f.read().strip() == digest and os.path.exists(clean_file):
+                return False
+    except OSError:
+        pass
+    df = read_registry_frame(raw_file)
+    _write_atomic(clean_file, lambda f: df.to_csv(f, index=False))
+    _write_atomic(hash_file, lambda f: f.write(digest))
+    return True
+
+
+def write_pairs(registry, path):
+    # a registry that was updated in place, written back out as Vehicle,FlatNumber rows
+    def write(f):
+        writer = csv.writer(f)
+        writer.writerow(["Vehicle", "FlatNumber"])
+        writer.writerows(registry.vehicle_flat_pairs.items())
+    _write_atomic(path, write)
+
+
+def merge_pairs(path, changes):
+    # An import's changes (vehicle -> new flat, None when removed) merged into a raw
+    # CSV: a moved plate's row gets its new flat, a removed plate's rows go, new
+    # plates are added at the end. Every other line is copied as it is, including
+    # rows the readers skip, so the sheet keeps them until someone fixes them.
+    pending = dict(changes)
+
+    def write(f):
+        writer = csv.writer(f, lineterminator="\n")
+        with open(path, "r", encoding="utf-8", newline="") as src:
+            f.write(src.readline())   # header
+            line, blank = "", []   # blank lines are written once a row follows them
+            for line in src:
+                if not line.strip():
+                    blank.append(line)
+                    continue
+                f.writelines(blank)
+                blank = []
+                row = next(csv.reader([line]), [])
+                vehicle = normalize_vehicle_input(row[0]) if row else ""
+                if vehicle not in changes:
+                    f.write(line)
+                elif pending.get(vehicle) is not None:
+                    writer.writerow([row[0], pending.pop(vehicle)] + row[2:])
+            if line.strip() and not line.endswith("\n"):
+                f.write("\n")
+        added = [(vehicle, flat) for vehicle, flat in pending.items() if flat is not None]
+        writer.writerows(added)
+        if not added:
+            f.writelines(blank)
+    _write_atomic(path, write)
+
+
+def write_clean_file(registry, clean_file, digest):
+    write_pairs(registry, clean_file)
+    _write_atomic(clean_file + ".sha256", lambda f: f.write(digest))
+
+
+def read_clean_frame(clean_file):
+    # already normalized: keep every value as the exact string that was written
+    return pd.read_csv(clean_file, dtype=str, keep_default_na=False)
+
+
+# ===== Streaming reads =====
+CHUNK_ROWS = 50000
+
+
+def iter_csv_pairs(path, chunksize=CHUNK_ROWS):
+    # normalized (vehicle, flat) pairs from the first two columns, one chunk in memory at a time
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        if chunk.shape[1] < 2:
+            raise ValueError("CSV file must have at least 2 columns: Vehicle and FlatNumber")
+        yield from zip(normalize_vehicle_series(chunk.iloc[:, 0]), normalize_flat_series(chunk.iloc[:, 1]))
+
+
+# One registry per CSV for the whole server process, shared by every session. It
+# is built once; when the raw file on disk changes afterwards, only the difference
+# is applied to it.
+_lock = threading.Lock()
+_registries = {}
+
+
+@timed("registry_load")
+def load_registry(raw_file="vehicle_flat_pairs.csv", clean_file="vehicle_flat_pairs_clean.csv"):
+    stat = os.stat(raw_file)   # FileNotFoundError if missing
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _registries.get(raw_file)
+        if cached and cached[0] == signature and os.path.exists(clean_file):
+            return cached[1]
+        if cached:
+            registry = cached[1]
+            registry.apply(iter_csv_pairs(raw_file), replace=True)
+            _refresh_clean_file(registry, raw_file, clean_file)
+        else:
+            build_clean_file(raw_file, clean_file)
+            registry = VehicleRegistry(read_clean_frame(clean_file))
+        _registries[raw_file] = (signature, registry)
+        return registry
+
+
+def _refresh_clean_file(registry, raw_file, clean_file):
+    digest = file_sha256(raw_file)
+    try:
+        with open(clean_file + ".sha256", "r") as f:
+            if f.read().strip() == digest and os.path.exists(clean_file):
+                return   # another app process already wrote it
+    except OSError:
+        pass
+    write_clean_file(registry, clean_file, digest)
+
+
+def update_registry(pairs, replace=False, raw_file="vehicle_flat_pairs.csv", clean_file="vehicle_flat_pairs_clean.csv"):
+    # Applies an import to the live registry and merges the difference into the raw
+    # CSV. This process keeps its registry as is; other app processes see the CSV
+    # change and apply the same difference. Returns a RegistryDiff.
+    registry = load_registry(raw_file, clean_file)
+    with _lock:
+        changes = {}
+        diff = registry.apply(pairs, replace, changes)
+        if any(diff):
+            merge_pairs(raw_file, changes)
+            write_clean_file(registry, clean_file, file_sha256(raw_file))
+            stat = os.stat(raw_file)
+            _registries[raw_file] = ((stat.st_mtime_ns, stat.st_size), registry)
+        return diff
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    raw_file = args[0] if args else "vehicle_flat_pairs.csv"
+    clean_file = args[1] if len(args) > 1 else "vehicle_flat_pairs_clean.csv"
+    if build_clean_file(raw_file, clean_file):
+        print(f"Wrote {clean_file}")
+    else:
+        print(f"{clean_file} is up to date")
@@ -0,0 +1,82 @@
+import os
+import re
+import sys
+import argparse
+
+from registry import normalize_vehicle_input, normalize_flat_input, iter_csv_pairs, update_registry
+
+# ===== Registry import =====
+# Merges a resident list (.xlsx or .csv) into vehicle_flat_pairs.csv without
+# anyone hand-editing the CSV:
+#
+#   python registry_import.py vehnew.xlsx [--replace] [--registry vehicle_flat_pairs.csv]
+#
+# Rows are streamed (openpyxl read-only mode, CSV in chunks), normalized with the
+# same normalizers the apps use, and only the difference is applied: new plates are
+# added and plates listed under another flat are moved. With --replace the file is
+# the complete list and plates missing from it are removed. Running apps notice the
+# CSV change and apply the same difference to their live registry.
+PLATE = re.compile(r"(?=.*\d)(?=.*[A-Z])[A-Z0-9]{4,12}")   # letters and digits; headers have no digits
+
+
+def looks_like_plate(text):
+    return bool(PLATE.fullmatch(text))
+
+
+def _flat_cell(value):
+    # Excel keeps 202 as a number and sometimes as 202.0
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_xlsx_pairs(path):
+    # Sheets like vehnew.xlsx put several (vehicle, flat) column pairs side by side,
+    # under a few title and header rows; every adjacent pair of columns is read, and
+    # cells that are not a plate next to a flat (titles, headers, blanks) are skipped.
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                for i in range(0, len(row) - 1, 2):
+                    vehicle = normalize_vehicle_input(row[i])
+                    flat = normalize_flat_input(_flat_cell(row[i + 1]))
+                    if flat and looks_like_plate(vehicle):
+                        yield vehicle, flat
+    finally:
+        workbook.close()
+
+
+def read_pairs(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        return iter_xlsx_pairs(path)
+    if extension == ".csv":
+        return iter_csv_pairs(path)
+    raise ValueError(f"Unsupported file type: {path} (use .xlsx or .csv)")
+
+
+def import_registry(path, replace=False, raw_file="vehicle_flat_pairs.csv", clean_file="vehicle_flat_pairs_clean.csv"):
+    # -> RegistryDiff(added, changed, removed)
+    return update_registry(read_pairs(path), replace, raw_file, clean_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a resident list into the vehicle registry")
+    parser.add_argument("path", help=".xlsx or .csv with vehicle and flat number columns")
+    parser.add_argument("--replace", action="store_true", help="the file is the full list: remove plates not in it")
+    parser.add_argument("--registry", default="vehicle_flat_pairs.csv")
+    parser.add_argument("--clean", default="vehicle_flat_pairs_clean.csv")
+    args = parser.parse_args()
+
+    try:
+        diff = import_registry(args.path, args.replace, args.registry, args.clean)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Import failed: {e}")
+    print(f"{args.path}: {diff.added} added, {diff.changed} moved to another flat, {diff.removed} removed -> {args.registry}")
+
+
+if __name__ == "__main__":
+    main()
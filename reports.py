@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+import gate_log
+from gate_log import IST
+from metrics import timed
+
+# ===== Historical reports over the gate logs =====
+# Everything here works on one DataFrame of gate events (load_entries) with
+# vectorized group-bys, so months of entries take seconds, not a Python loop
+# per line. Text columns are categoricals: a year of logs repeats the same few
+# thousand plates and flats over and over.
+UNKNOWN_FLAT = "Unknown Flat"
+
+
+def categorical(column):
+    # fixed-width bytes column -> pandas Categorical, decoding each distinct value once
+    uniques, codes = np.unique(column, return_inverse=True)
+    categories = [value.rstrip(b"\0").decode("utf-8", "ignore") for value in uniques.tolist()]
+    if len(set(categories)) < len(categories):   # two byte strings decoding to the same text
+        return pd.Categorical([categories[code] for code in codes])
+    return pd.Categorical.from_codes(codes.astype(np.int32), categories)
+
+
+@timed("report_load")
+def load_entries(gates=(1, 2), start=None, end=None):
+    # One row per gate event for the days start..end (default today), oldest first.
+    # Older logs have one copy of an event per logged-in guard; those copies share
+    # gate, time, plate and action and are counted once here.
+    columns = [gate_log.read_columns(gate, start, end) for gate in gates]
+    records = np.concatenate(columns) if columns else np.empty(0, dtype=gate_log.RECORD_DTYPE)
+    df = pd.DataFrame({
+        "gate": records["gate"].astype(np.int16),
+        "ts": records["ts"],
+        "action": categorical(records["action"]),
+        "vehicle_type": categorical(records["vehicle_type"]),
+        "number": categorical(records["number"]),
+        "flat": categorical(records["flat"]),
+    })
+    df = df.drop_duplicates(["gate", "ts", "number", "action"])
+    df = df.sort_values("ts", kind="stable", ignore_index=True)
+    df["time"] = pd.to_datetime(df["ts"], unit="s", utc=True).dt.tz_convert(IST)
+    return df
+
+
+def hourly_load(df):
+    # average entries per day for each hour of the day, one column per gate and action
+    if df.empty:
+        return pd.DataFrame(index=pd.RangeIndex(24, name="Hour"))
+    days = max(df["time"].dt.normalize().nunique(), 1)
+    counts = pd.crosstab(df["time"].dt.hour.rename("Hour"), [df["gate"], df["action"]])
+    counts = counts.reindex(range(24), fill_value=0) / days
+    counts.columns = [f"Gate {gate} {action}" for gate, action in counts.columns]
+    return counts
+
+
+def occupancy(df):
+    # Vehicles inside now: plates whose latest event is an IN. (A plain IN-minus-OUT
+    # balance would keep a plate "inside" forever after one missed OUT.)
+    if df.empty:
+        return pd.DataFrame(columns=["Number", "Flat", "Vehicle", "Gate", "Inside since"])
+    latest = df.drop_duplicates("number", keep="last")
+    inside = latest[latest["action"] == "IN"].sort_values("ts", ascending=False)
+    return pd.DataFrame({
+        "Number": inside["number"].astype(str),
+        "Flat": inside["flat"].astype(str),
+        "Vehicle": inside["vehicle_type"].astype(str),
+        "Gate": inside["gate"],
+        "Inside since": inside["time"].dt.strftime("%d-%m-%Y %I:%M %p"),
+    }).reset_index(drop=True)
+
+
+def visits(df):
+    # Every IN followed by an OUT of the same plate, with how long the vehicle stayed.
+    ordered = df.sort_values(["number", "ts"], kind="stable", ignore_index=True)
+    number = ordered["number"].cat.codes.to_numpy()
+    is_in = (ordered["action"] == "IN").to_numpy()
+    is_out = (ordered["action"] == "OUT").to_numpy()
+    paired = np.zeros(len(ordered), dtype=bool)
+    paired[:-1] = is_in[:-1] & is_out[1:] & (number[:-1] == number[1:])
+    out_rows = np.flatnonzero(paired) + 1
+    ins = ordered[paired].reset_index(drop=True)
+    return pd.DataFrame({
+        "number": ins["number"],
+        "flat": ins["flat"],
+        "vehicle_type": ins["vehicle_type"],
+        "gate": ins["gate"],
+        "time_in": ins["time"],
+        "time_out": ordered["time"].iloc[out_rows].reset_index(drop=True),
+        "dwell": pd.to_timedelta(ordered["ts"].to_numpy()[out_rows] - ins["ts"].to_numpy(), unit="s"),
+    })
+
+
+def dwell_by_flat(df):
+    # per flat: visits, distinct vehicles and dwell time statistics (hours)
+    flat_visits = visits(df)
+    flat_visits = flat_visits[flat_visits["flat"] != UNKNOWN_FLAT]
+    hours = flat_visits["dwell"].dt.total_seconds() / 3600
+    report = hours.groupby(flat_visits["flat"], observed=True).agg(["count", "median", "mean", "max"])
+    report.insert(1, "vehicles", flat_visits.groupby("flat", observed=True)["number"].nunique())
+    report.columns = ["Visits", "Vehicles", "Median hours", "Mean hours", "Longest hours"]
+    report.index.name = "Flat"
+    return report.sort_values("Visits", ascending=False).round(2)
+
+
+def unknown_flat_plates(df, top=20):
+    # plates not in the registry, most frequent first
+    unknown = df[df["flat"] == UNKNOWN_FLAT]
+    if unknown.empty:
+        return pd.DataFrame(columns=["Number", "Entries", "First seen", "Last seen", "Gates"])
+    unknown = unknown.assign(number=unknown["number"].astype(str))
+    grouped = unknown.groupby("number")
+    report = pd.DataFrame({
+        "Entries": grouped.size(),
+        "First seen": grouped["time"].min(),
+        "Last seen": grouped["time"].max(),
+        "Gates": grouped["gate"].unique().map(lambda gates: ", ".join(map(str, sorted(gates)))),
+    })
+    report = report.sort_values(["Entries", "Last seen"], ascending=False).head(top)
+    for column in ("First seen", "Last seen"):
+        report[column] = report[column].dt.strftime("%d-%m-%Y")
+    return report.rename_axis("Number").reset_index()
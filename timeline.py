@@ -0,0 +1,95 @@
+import heapq
+from collections import namedtuple
+from datetime import datetime, time
+from itertools import islice
+
+import numpy as np
+
+import gate_log
+from gate_log import GUARD_SEP, IST, day_of, ensure_migrated, iter_day_blocks, list_gates, records_from_rows
+from metrics import timed
+from registry import normalize_vehicle_input, normalize_flat_input
+
+# ===== All-gates timeline =====
+# Every gate's log is already in time order, so the combined timeline is a k-way
+# merge (heapq.merge) of one stream per gate. Each stream reads its day partitions
+# BLOCK records at a time (archived days are decompressed as a stream too) and
+# filters every block in numpy before anything becomes a LogRecord. A page holds
+# at most k blocks plus the page itself, however long the period is.
+#
+# Pages are addressed by a cursor, the (ts, gate, entry_no) of the last entry shown:
+# the next page is the merge restarted just after it, from that entry's day on.
+BLOCK = 1024   # records read at a time per gate
+_SEP = GUARD_SEP.encode()
+
+TimelineFilter = namedtuple("TimelineFilter", "start_ts end_ts plate flat user")
+
+
+def make_filter(start_day, end_day, start_time=time.min, end_time=time.max, plate="", flat="", user=""):
+    # plate matches anywhere in the number ("4866"), flat must match exactly and
+    # user must be one of the guards on the entry
+    return TimelineFilter(
+        IST.localize(datetime.combine(start_day, start_time)).timestamp(),
+        IST.localize(datetime.combine(end_day, end_time)).timestamp(),
+        normalize_vehicle_input(plate).encode(),
+        normalize_flat_input(flat).encode() if flat else b"",
+        (GUARD_SEP + user + GUARD_SEP).encode() if user else b"",
+    )
+
+
+def _keep(block, spec, after):
+    ts = block["ts"]
+    keep = (ts >= spec.start_ts) & (ts <= spec.end_ts)
+    if spec.plate:
+        keep &= np.char.find(block["number"], spec.plate) >= 0
+    if spec.flat:
+        keep &= block["flat"] == spec.flat
+    if spec.user:
+        on_duty = np.char.add(np.char.add(_SEP, block["user"]), _SEP)
+        keep &= np.char.find(on_duty, spec.user) >= 0
+    if after:
+        after_ts, after_gate, after_entry = after
+        keep &= (ts > after_ts) | ((ts == after_ts) & (
+            (block["gate"] > after_gate) | ((block["gate"] == after_gate) & (block["entry_no"] > after_entry))))
+    return keep
+
+
+def filter_block(block, spec):
+    # the records of a structured array that pass the filter, in their order
+    return block[_keep(block, spec, None)]
+
+
+def _gate_stream(gate, spec, after):
+    # LogRecords of one gate that pass the filter, oldest first
+    start_day = day_of(max(spec.start_ts, after[0] if after else spec.start_ts))
+    for block in iter_day_blocks(gate, start_day, day_of(spec.end_ts), BLOCK):
+        yield from records_from_rows(block[_keep(block, spec, after)])
+
+
+def cursor_of(record):
+    return (record.ts, record.gate, record.entry_no)
+
+
+def iter_timeline(spec, gates=None, after=None):
+    # every matching entry of all gates in time order, starting after the cursor `after`
+    if gates is None:
+        gates = list_gates()
+    for gate in gates:
+        ensure_migrated(gate)
+    streams = [_gate_stream(gate, spec, after) for gate in gates]
+    return heapq.merge(*streams, key=cursor_of)
+
+
+@timed("timeline_page")
+def timeline_page(spec, after=None, page_size=50, gates=None):
+    # (up to page_size LogRecords, cursor for the next page or None when this is the last)
+    records = list(islice(iter_timeline(spec, gates, after), page_size + 1))
+    if len(records) > page_size:
+        return records[:page_size], cursor_of(records[page_size - 1])
+    return records, None
+
+
+def timeline_to_frame(records):
+    frame = gate_log.records_to_frame(records)
+    frame.insert(0, "Date", [datetime.fromtimestamp(r.ts, IST).strftime("%d-%m-%Y") for r in records])
+    return frame
@@ -1,9 +1,8 @@
 import os
-import re
 import sys
 import openpyxl
 import streamlit as st
-import pandas as pd
+from registry import load_registry, normalize_vehicle_input, normalize_flat_input
 
 # ===== Python version check =====
 st.write("Python version:", sys.version)
@@ -12,24 +11,6 @@ st.write("openpyxl version:", openpyxl.__version__)
 # ===== App Heading =====
 st.markdown("<h1 style='color:blue; font-size:60px;'>Rishabh Tower Security</h1>", unsafe_allow_html=True)
 
-# ===== Helper functions =====
-def normalize_vehicle_input(vehicle_number):
-    if pd.isna(vehicle_number):
-        return ""
-    text = str(vehicle_number).upper()
-    text = re.sub(r"\s+", "", text)
-    text = text.replace("O", "0")
-    return text.strip()
-
-def normalize_flat_input(flat_number):
-    if pd.isna(flat_number):
-        return ""
-    text = str(flat_number).upper()
-    text = re.sub(r"\s+", "", text)
-    if text.isnumeric():
-        text = "F" + text
-    return text.strip()
-
 # ===== File setup =====
 raw_file = "vehicle_flat_pairs.csv"
 clean_file = "vehicle_flat_pairs_clean.csv"
@@ -38,35 +19,17 @@ if not os.path.exists(raw_file):
     st.error(f"File not found: {raw_file}")
     st.stop()
 
+# Built once per server process and reused until the CSV changes; the normalized
+# clean file is only rewritten when the raw CSV's content changes
 try:
-    df = pd.read_csv(raw_file)
+    vehicle_registry = load_registry(raw_file, clean_file)
     st.success(f"File '{raw_file}' loaded successfully!")
 except Exception as e:
     st.error(f"Error reading file '{raw_file}': {e}")
     st.stop()
 
-if df.shape[1] < 2:
-    st.error("CSV file must have at least 2 columns: Vehicle and FlatNumber")
-    st.stop()
-
-# ===== Normalize dataframe =====
-df = df.iloc[:, :2]
-df.columns = ["Vehicle", "FlatNumber"]
-
-df["Vehicle"] = df["Vehicle"].apply(normalize_vehicle_input)
-df["FlatNumber"] = df["FlatNumber"].apply(normalize_flat_input)
-
-# Save normalized clean file
-df.to_csv(clean_file, index=False)
-
-# ===== Build dictionaries =====
-vehicle_flat_pairs = dict(zip(df["Vehicle"], df["FlatNumber"]))
-
-flat_to_vehicles = {}
-for vehicle, flat in vehicle_flat_pairs.items():
-    if flat not in flat_to_vehicles:
-        flat_to_vehicles[flat] = []
-    flat_to_vehicles[flat].append(vehicle)
+vehicle_flat_pairs = vehicle_registry.vehicle_flat_pairs
+flat_to_vehicles = vehicle_registry.flat_to_vehicles
 
 # ===== Streamlit Input =====
 st.markdown("<h3 style='color:green; font-size:40px;'>Vehicle या Flat Number डालें</h3>", unsafe_allow_html=True)
@@ -110,6 +73,18 @@ if st.button("रिज़ल्ट देखें"):
             unsafe_allow_html=True,
         )
 
+    # ----- Partial / mistyped vehicle number -----
+    elif candidates := vehicle_registry.find_vehicles(user_input):
+        st.markdown(
+            "<h2 style='color:red; font-size:40px;'>पूरा नंबर नहीं मिला। क्या आपका मतलब इनमें से कोई है?</h2>",
+            unsafe_allow_html=True,
+        )
+        for vehicle, flat, match in candidates:
+            st.markdown(
+                f"<h3 style='color:red; font-size:32px;'>Vehicle {vehicle} → Flat {flat} <small>({match})</small></h3>",
+                unsafe_allow_html=True,
+            )
+
     else:
         st.markdown(
             "<h2 style='color:red; font-size:50px;'>..यह गाड़ी रिषभ टावर की वाहन सूची में नहीं है। "
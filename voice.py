@@ -0,0 +1,218 @@
+import time
+import queue
+import threading
+from collections import deque
+
+import numpy as np
+
+from metrics import observe
+
+# ========================== In-memory audio pipeline ==========================
+# WebRTC frames -> mono float32 ring buffer -> 16 kHz float32 array that is handed
+# to Whisper directly (no temp WAV, no ffmpeg decode).
+WHISPER_RATE = 16000
+
+
+def frame_to_mono(frame):
+    # av.AudioFrame -> 1-D float32 in [-1, 1], channels averaged
+    pcm = frame.to_ndarray()
+    channels = len(frame.layout.channels)
+    if frame.format.is_planar:
+        pcm = pcm.reshape(channels, -1)
+    else:
+        pcm = pcm.reshape(-1, channels).T   # packed formats interleave the channels
+    if np.issubdtype(pcm.dtype, np.integer):
+        scale = float(np.iinfo(pcm.dtype).max) + 1
+        pcm = pcm.astype(np.float32) / scale
+    return pcm.astype(np.float32, copy=False).mean(axis=0)
+
+
+def resample(audio, src_rate, dst_rate=WHISPER_RATE):
+    if src_rate == dst_rate or not len(audio):
+        return audio.astype(np.float32, copy=False)
+    if src_rate > dst_rate:
+        # cheap anti-aliasing: moving average over one output sample period
+        width = int(round(src_rate / dst_rate))
+        if width > 1:
+            audio = np.convolve(audio, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    duration = len(audio) / src_rate
+    dst_len = int(round(duration * dst_rate))
+    src_times = np.arange(len(audio), dtype=np.float64) / src_rate
+    dst_times = np.arange(dst_len, dtype=np.float64) / dst_rate
+    return np.interp(dst_times, src_times, audio).astype(np.float32)
+
+
+class AudioRingBuffer:
+    # Fixed-size mono buffer at the stream's own sample rate; once full the oldest
+    # audio is overwritten, so memory stays at `seconds` of audio however long the
+    # stream runs. Safe to fill from the WebRTC thread while the script reads it.
+    def __init__(self, seconds=30, sample_rate=48000):
+        self.seconds = seconds
+        self.sample_rate = sample_rate
+        self._data = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+        self._end = 0      # total samples ever written
+        self._start = 0    # first sample not yet taken
+        self._lock = threading.Lock()
+
+    def append(self, samples, sample_rate):
+        with self._lock:
+            if sample_rate != self.sample_rate:
+                # stream rate differs from what we allocated for: start over at the real rate
+                self.sample_rate = sample_rate
+                self._data = np.zeros(int(self.seconds * sample_rate), dtype=np.float32)
+                self._start = self._end = 0
+            size = len(self._data)
+            if len(samples) > size:
+                self._end += len(samples) - size
+                samples = samples[-size:]
+            pos = self._end % size
+            first = min(len(samples), size - pos)
+            self._data[pos:pos + first] = samples[:first]
+            self._data[:len(samples) - first] = samples[first:]
+            self._end += len(samples)
+            self._start = max(self._start, self._end - size)
+
+    def __len__(self):
+        with self._lock:
+            return self._end - self._start
+
+    def take(self):
+        # everything buffered since the last take(), oldest first, at the stream rate
+        with self._lock:
+            size = len(self._data)
+            count = self._end - self._start
+            pos = self._start % size
+            if pos + count <= size:
+                audio = self._data[pos:pos + count].copy()
+            else:
+                audio = np.concatenate((self._data[pos:], self._data[:pos + count - size]))
+            self._start = self._end
+            return audio, self.sample_rate
+
+    def take_for_whisper(self):
+        audio, rate = self.take()
+        return resample(audio, rate)
+
+
+# ========================== Streaming: voice activity detection ==========================
+class UtteranceSegmenter:
+    # Cheap energy VAD over ~20 ms WebRTC frames. Speech starts after `start_frames`
+    # loud frames in a row (with `pre_roll` seconds of lead-in kept) and ends after
+    # `end_silence` seconds of quiet, or at `max_seconds`, whichever comes first.
+    # The noise floor adapts to the gate's background so traffic noise alone does
+    # not count as speech. Finished utterances go to on_utterance(audio_16k).
+    def __init__(self, on_utterance, threshold=0.01, noise_factor=3.0, start_frames=3,
+                 end_silence=0.6, pre_roll=0.3, max_seconds=8.0, min_seconds=0.4):
+        self.on_utterance = on_utterance
+        self.threshold = threshold
+        self.noise_factor = noise_factor
+        self.start_frames = start_frames
+        self.end_silence = end_silence
+        self.pre_roll = pre_roll
+        self.max_seconds = max_seconds
+        self.min_seconds = min_seconds
+        self.noise_floor = threshold / noise_factor
+        self._recent = deque()          # (samples) before speech starts, for the pre-roll
+        self._recent_len = 0
+        self._speech = []
+        self._speech_len = 0
+        self._loud_run = 0
+        self._quiet_len = 0
+        self.in_speech = False
+
+    def _is_loud(self, samples):
+        rms = float(np.sqrt(np.mean(np.square(samples)))) if len(samples) else 0.0
+        loud = rms > max(self.threshold, self.noise_floor * self.noise_factor)
+        if not loud:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return loud
+
+    def feed(self, samples, sample_rate):
+        loud = self._is_loud(samples)
+        if not self.in_speech:
+            self._recent.append(samples)
+            self._recent_len += len(samples)
+            while self._recent and self._recent_len - len(self._recent[0]) >= self.pre_roll * sample_rate:
+                self._recent_len -= len(self._recent.popleft())
+            self._loud_run = self._loud_run + 1 if loud else 0
+            if self._loud_run >= self.start_frames:
+                self.in_speech = True
+                self._speech = list(self._recent)
+                self._speech_len = self._recent_len
+                self._recent.clear()
+                self._recent_len = 0
+                self._quiet_len = 0
+            return
+
+        self._speech.append(samples)
+        self._speech_len += len(samples)
+        self._quiet_len = 0 if loud else self._quiet_len + len(samples)
+        if self._quiet_len >= self.end_silence * sample_rate or self._speech_len >= self.max_seconds * sample_rate:
+            self._finish(sample_rate)
+
+    def _finish(self, sample_rate):
+        audio = np.concatenate(self._speech) if self._speech else np.empty(0, dtype=np.float32)
+        self._speech = []
+        self._speech_len = 0
+        self._loud_run = 0
+        self.in_speech = False
+        if len(audio) >= self.min_seconds * sample_rate:
+            self.on_utterance(resample(audio, sample_rate))
+
+
+# ========================== Streaming: background transcription ==========================
+class UtteranceTranscriber:
+    # Sends finished utterances to the Whisper worker from a background thread and
+    # collects the texts. At most `max_pending` utterances wait at a time; beyond
+    # that the oldest is dropped rather than letting audio pile up in memory.
+    def __init__(self, client, max_pending=4, poll_interval=0.1):
+        self.client = client
+        self.poll_interval = poll_interval
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._texts = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="utterance-transcriber", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio):
+        if self._closed and audio is not None:
+            return
+        while True:
+            try:
+                self._pending.put_nowait((time.time(), audio))
+                return
+            except queue.Full:
+                try:
+                    self._pending.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        self._closed = True
+        self.submit(None)
+
+    def _run(self):
+        while True:
+            spoken_at, audio = self._pending.get()
+            if audio is None:
+                return
+            try:
+                started = time.perf_counter()
+                job = self.client.submit(audio)
+                status, text = self.client.poll(job)
+                while status == "pending":
+                    time.sleep(self.poll_interval)
+                    status, text = self.client.poll(job)
+                observe("transcription", time.perf_counter() - started)
+            except (OSError, EOFError, RuntimeError) as e:
+                status, text = "error", str(e)
+            self._texts.put((spoken_at, status, text))
+
+    def results(self):
+        # [(spoken_at, status, text)] finished since the last call
+        done = []
+        while True:
+            try:
+                done.append(self._texts.get_nowait())
+            except queue.Empty:
+                return done
@@ -0,0 +1,183 @@
+import time
+
+import streamlit as st
+from streamlit_webrtc import webrtc_streamer, AudioProcessorBase, WebRtcMode
+
+import metrics
+from metrics import timed
+from gate_app import get_registry, log_entries, logged_in_guards, rerun_section
+from gate_log import format_record
+from presence import get_presence
+from voice import AudioRingBuffer, UtteranceSegmenter, UtteranceTranscriber, frame_to_mono
+from voice_parse import parse_voice_entry, needs_choice
+from whisper_worker import TranscriptionClient
+
+# ========================== Voice Input Section ==========================
+# Imported by Test4.py only once a user turns voice input on, so streamlit_webrtc
+# (and the av/aiortc stack under it) is never loaded for guards who type. The panel
+# is a fragment: its buttons and toggles rerun only the panel, not the whole page.
+
+
+def log_voice_text(gate, text):
+    # -> (ok, message) for the recognized text of one utterance. The spoken plate is
+    # snapped to the registry, so a slightly misheard number still logs the right vehicle.
+    # Like typed entries, the entry carries every guard on duty. When several registry
+    # plates fit equally well, or the match is weak, nothing is logged: the plates are
+    # kept in voice_choice for the guard to pick one (or to say the number again).
+    guards = logged_in_guards()
+    if not guards:
+        return False, "⚠️ Koi guard logged in nahi hai. Entry log karne ke liye guard login karein."
+    entry = parse_voice_entry(text, get_registry())
+    if entry.vehicle_type and entry.plate and entry.action:
+        if needs_choice(entry.plate):
+            candidates = entry.plate.candidates or ((entry.plate.number, entry.plate.flat),)
+            st.session_state.voice_choice = (gate, entry.vehicle_type, entry.action, candidates)
+            return False, (f"⚠️ \"{text.upper()}\" se {len(candidates)} vehicle match hue ({entry.plate.match}), "
+                           "log nahi kiya. Neeche se gaadi chunein ya number dobara bolein.")
+        st.session_state.voice_choice = None
+        return log_voice_entry(gate, guards, entry.vehicle_type, entry.plate.number, entry.action, "Logged Automatically")
+    return False, f"⚠️ Could not parse all details from \"{text.upper()}\". Try speaking clearly."
+
+
+def log_voice_entry(gate, guards, vehicle_type, number, action, how):
+    mismatch = get_presence().check(number, action)
+    try:
+        records = log_entries(gate, guards, vehicle_type, [number], action)
+    except ValueError as e:
+        return False, f"⚠️ {e}. Try speaking clearly."
+    message = f"✅ Vehicle {how}: {format_record(records[0])}"
+    if mismatch:
+        message += f" {mismatch}"
+    return True, message
+
+
+def voice_choice_buttons():
+    # the plates an unclear spoken number matched; one tap logs the right one
+    choice = st.session_state.get("voice_choice")
+    if not choice:
+        return None
+    gate, vehicle_type, action, candidates = choice
+    box = st.empty()   # cleared as soon as a plate is picked
+    with box.container():
+        st.markdown(f"**🤔 Kaunsi gaadi? ({vehicle_type} {action}, Gate {gate})**")
+        columns = st.columns(len(candidates) + 1)
+        picked = [number for column, (number, flat) in zip(columns, candidates)
+                  if column.button(f"{number} ({flat})", key=f"voice_pick_{number}")]
+        cancelled = columns[-1].button("❌ Cancel", key="voice_pick_cancel")
+    if picked or cancelled:
+        box.empty()
+        st.session_state.voice_choice = None
+    if picked:
+        guards = logged_in_guards()
+        if not guards:
+            return False, "⚠️ Koi guard logged in nahi hai. Entry log karne ke liye guard login karein."
+        return log_voice_entry(gate, guards, vehicle_type, picked[0], action, "Logged")
+    return None
+
+
+class AudioProcessor(AudioProcessorBase):
+    def __init__(self):
+        # last 30 s of mono audio at the stream's real sample rate
+        self.audio_buffer = AudioRingBuffer(seconds=30)
+        # hands-free mode: utterances are cut at pauses and transcribed in the background
+        self.hands_free = False
+        self.transcriber = UtteranceTranscriber(TranscriptionClient())
+        self.segmenter = UtteranceSegmenter(self.transcriber.submit)
+
+    def recv(self, frame):
+        samples = frame_to_mono(frame)
+        self.audio_buffer.append(samples, frame.sample_rate)
+        if self.hands_free:
+            self.segmenter.feed(samples, frame.sample_rate)
+        return frame
+
+    def on_ended(self):
+        self.transcriber.close()
+
+
+# Hands-free results are picked up every second without rerunning the whole page
+@st.fragment(run_every=1)
+def hands_free_results(webrtc_ctx):
+    audio_processor = webrtc_ctx.audio_processor
+    if "voice_results" not in st.session_state:
+        st.session_state.voice_results = []
+    if audio_processor:
+        for spoken_at, status, text in audio_processor.transcriber.results():
+            if status == "error":
+                st.session_state.voice_results.append((False, f"❌ Could not recognize speech: {text}"))
+            elif text.strip():
+                st.session_state.voice_results.append(log_voice_text(st.session_state.voice_gate, text))
+        del st.session_state.voice_results[:-5]
+    picked = voice_choice_buttons()
+    if picked:
+        st.session_state.voice_results.append(picked)
+        rerun_section()
+    for ok, message in reversed(st.session_state.voice_results):
+        (st.success if ok else st.warning)(message)
+
+
+@st.fragment
+@timed("page_voice_panel")
+def voice_section():
+    # Whisper stays loaded in its own worker process (whisper_worker.py); this script only
+    # submits audio and polls for the text, so the UI starts without waiting for the model
+    transcriber = TranscriptionClient()
+    worker_status = transcriber.status()
+    if worker_status is None:
+        transcriber.ensure_worker()
+        st.info("⏳ Voice recognition is starting, please wait...")
+    elif worker_status["error"]:
+        st.error(f"❌ Voice recognition unavailable: {worker_status['error']}")
+    elif not worker_status["ready"]:
+        st.info("⏳ Voice recognition model is loading, please wait...")
+
+    voice_gate = st.radio("Select Gate for Voice Entry", [1,2], key="voice_gate", horizontal=True)
+    hands_free = st.toggle("🎙️ Hands-free: log automatically when I stop speaking", key="hands_free")
+
+    webrtc_ctx = webrtc_streamer(
+        key="voice-input",
+        mode=WebRtcMode.SENDRECV,
+        audio_processor_factory=AudioProcessor,
+        media_stream_constraints={"audio": True, "video": False},
+        async_processing=True
+    )
+
+    if webrtc_ctx.audio_processor:
+        webrtc_ctx.audio_processor.hands_free = hands_free
+
+    if webrtc_ctx.state.playing and not hands_free:
+        if st.button("Process Voice Input"):
+            audio_processor = webrtc_ctx.audio_processor
+            if audio_processor and len(audio_processor.audio_buffer):
+                # 16 kHz float32 straight from memory; Whisper takes the array as-is
+                audio_data = audio_processor.audio_buffer.take_for_whisper()
+                try:
+                    st.session_state.voice_job = transcriber.submit(audio_data)
+                    st.session_state.voice_job_started = time.perf_counter()
+                except (OSError, EOFError, RuntimeError) as e:
+                    st.error(f"❌ Voice recognition unavailable: {e}")
+            else:
+                st.warning("⚠️ No audio detected. Please speak clearly.")
+
+    if st.session_state.get("voice_job"):
+        status, text = transcriber.poll(st.session_state.voice_job)
+        if status == "pending":
+            with st.spinner("📝 Recognizing speech..."):
+                time.sleep(0.5)
+            rerun_section()
+        st.session_state.voice_job = None
+        metrics.observe("transcription", time.perf_counter() - st.session_state.get("voice_job_started", time.perf_counter()))
+
+        if status == "error":
+            st.error(f"❌ Could not recognize speech: {text}")
+        else:
+            st.success(f"📝 Recognized Text: {text.upper()}")
+            ok, message = log_voice_text(voice_gate, text)
+            (st.success if ok else st.warning)(message)
+
+    if hands_free and webrtc_ctx.state.playing:
+        hands_free_results(webrtc_ctx)
+    else:
+        picked = voice_choice_buttons()
+        if picked:
+            (st.success if picked[0] else st.warning)(picked[1])
@@ -0,0 +1,122 @@
+import re
+from collections import namedtuple
+
+from registry import normalize_vehicle_input
+
+# ========================== Spoken entry -> vehicle entry ==========================
+# Whisper writes plates the way guards say them ("M H zero one A W double zero
+# seven six"). We turn spoken letters/numbers back into characters, cut out the
+# runs of tokens that can belong to a plate and snap them to the registry.
+DIGIT_WORDS = {
+    "ZERO": "0", "OH": "0", "NIL": "0", "ONE": "1", "TWO": "2", "TO": "2", "TOO": "2", "THREE": "3",
+    "FOUR": "4", "FOR": "4", "FIVE": "5", "SIX": "6", "SEVEN": "7", "EIGHT": "8", "NINE": "9",
+    # Hindi, as Whisper usually transliterates it
+    "SHUNYA": "0", "EK": "1", "TEEN": "3", "CHAAR": "4", "CHAR": "4", "PAANCH": "5", "PANCH": "5",
+    "CHHE": "6", "CHHAH": "6", "SAAT": "7", "AATH": "8", "NAU": "9",
+}
+LETTER_WORDS = {
+    "AY": "A", "BEE": "B", "SEE": "C", "SEA": "C", "DEE": "D", "EE": "E", "EF": "F", "GEE": "G", "JEE": "G",
+    "AITCH": "H", "EDGE": "H", "EYE": "I", "JAY": "J", "KAY": "K", "EL": "L", "EM": "M", "EN": "N",
+    "PEE": "P", "CUE": "Q", "QUEUE": "Q", "AR": "R", "ARE": "R", "ES": "S", "ESS": "S", "TEE": "T", "TEA": "T",
+    "YOU": "U", "VEE": "V", "EX": "X", "WHY": "Y", "ZED": "Z", "ZEE": "Z",
+    # NATO alphabet
+    "ALPHA": "A", "BRAVO": "B", "CHARLIE": "C", "DELTA": "D", "ECHO": "E", "FOXTROT": "F", "GOLF": "G",
+    "HOTEL": "H", "INDIA": "I", "JULIET": "J", "KILO": "K", "LIMA": "L", "MIKE": "M", "NOVEMBER": "N",
+    "OSCAR": "O", "PAPA": "P", "QUEBEC": "Q", "ROMEO": "R", "SIERRA": "S", "TANGO": "T", "UNIFORM": "U",
+    "VICTOR": "V", "WHISKEY": "W", "XRAY": "X", "YANKEE": "Y", "ZULU": "Z",
+}
+REPEAT_WORDS = {"DOUBLE": 2, "TRIPLE": 3}
+FILLER_WORDS = {"IS", "AT", "OF", "NO", "ON", "BY", "HE", "IT", "AN"}
+
+VEHICLE_TYPE_WORDS = {"CAR": "Car", "BIKE": "Bike", "SCOOTY": "Scooty", "SCOOTER": "Scooty", "TAXI": "Taxi", "EV": "EV"}
+ACTION_WORDS = {"IN": "IN", "ENTRY": "IN", "ANDAR": "IN", "OUT": "OUT", "EXIT": "OUT", "BAHAR": "OUT"}
+
+PLATE_PATTERN = re.compile(r"[A-Z]{2}[0-9]{1,2}[A-Z]{0,3}[0-9]{1,4}|[0-9]{2}BH[0-9]{4}[A-Z]{1,2}")
+
+# confidence per registry match kind (see plate_index)
+MATCH_CONFIDENCE = {"exact": 1.0, "confusable": 0.9, "one edit": 0.75, "suffix": 0.6, "substring": 0.5}
+UNREGISTERED_CONFIDENCE = 0.4
+AUTO_LOG_CONFIDENCE = 0.6   # weaker registry matches are never logged without the guard choosing
+CHOICES = 5                 # registry plates offered when several fit equally well
+
+# candidates: (number, flat) of every registry plate that fits as well as this one,
+# when there are several; empty when the match is unique
+PlateMatch = namedtuple("PlateMatch", "number flat confidence match candidates")
+VoiceEntry = namedtuple("VoiceEntry", "vehicle_type plate action")
+
+
+def _tokens(text):
+    return re.findall(r"[A-Z0-9]+", text.upper().replace("DOUBLE YOU", "W").replace("X RAY", "XRAY"))
+
+
+def plate_runs(text):
+    # Candidate plate strings: maximal runs of tokens that spell letters or digits.
+    # Vehicle-type/action words and ordinary words end a run.
+    runs, current, repeat = [], "", 1
+    for token in _tokens(text):
+        if token in REPEAT_WORDS:
+            repeat = REPEAT_WORDS[token]
+            continue
+        if token in DIGIT_WORDS:
+            chars = DIGIT_WORDS[token]
+        elif token in LETTER_WORDS:
+            chars = LETTER_WORDS[token]
+        elif token in VEHICLE_TYPE_WORDS or token in ACTION_WORDS or token in FILLER_WORDS:
+            chars = None
+        elif token.isdigit() or len(token) <= 2 or re.search(r"\d", token):
+            chars = token   # "M", "MH", "01", "MH01AB1234", ...
+        else:
+            chars = None
+        if chars is None:
+            if current:
+                runs.append(current)
+            current, repeat = "", 1
+            continue
+        # "double seven" -> "77"; "double 0" -> "00"
+        current += chars[0] * (repeat - 1) + chars if repeat > 1 else chars
+        repeat = 1
+    if current:
+        runs.append(current)
+    return runs
+
+
+def decode_plate(text, registry):
+    # Best PlateMatch for the spoken text, preferring registry plates; None if nothing plate-like was said
+    best = None
+    for run in plate_runs(text):
+        run = normalize_vehicle_input(run)
+        if len(run) < 4:
+            continue
+        candidates = [run]
+        pattern_hit = PLATE_PATTERN.search(run)   # drops filler glued on either side
+        if pattern_hit and pattern_hit.group(0) != run:
+            candidates.append(pattern_hit.group(0))
+        for candidate in candidates:
+            hits = registry.find_vehicles(candidate, limit=CHOICES)
+            if hits:
+                vehicle, flat, match = hits[0]
+                tied = tuple((number, number_flat) for number, number_flat, kind in hits if kind == match)
+                found = PlateMatch(vehicle, flat, MATCH_CONFIDENCE[match], match, tied if len(tied) > 1 else ())
+            elif PLATE_PATTERN.fullmatch(candidate):
+                found = PlateMatch(candidate, "Unknown Flat", UNREGISTERED_CONFIDENCE, "unregistered", ())
+            else:
+                continue
+            if best is None or found.confidence > best.confidence:
+                best = found
+    return best
+
+
+def needs_choice(plate):
+    # a registry match that must not be logged on its own: several plates fit
+    # equally well, or the match is too weak. A complete plate that is not in the
+    # registry (a visitor) is logged as Unknown Flat as before.
+    if plate.candidates:
+        return True
+    return plate.match != "unregistered" and plate.confidence < AUTO_LOG_CONFIDENCE
+
+
+def parse_voice_entry(text, registry):
+    tokens = _tokens(text)
+    vehicle_type = next((VEHICLE_TYPE_WORDS[t] for t in tokens if t in VEHICLE_TYPE_WORDS), None)
+    action = next((ACTION_WORDS[t] for t in tokens if t in ACTION_WORDS), None)
+    return VoiceEntry(vehicle_type, decode_plate(text, registry), action)
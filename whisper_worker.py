@@ -0,0 +1,248 @@
+# ========================== Whisper transcription worker ==========================
+# Keeps the speech model loaded in its own process so the Streamlit app never pays
+# for importing/loading it and never blocks a script thread on transcription.
+#
+#   python whisper_worker.py [--model small] [--backend whisper|int8] [--replicas 1]
+#
+# The app talks to it over a Unix socket with TranscriptionClient: submit() hands
+# over audio (a 16 kHz mono float32 array, or an audio file path) and returns a job id
+# straight away, poll() returns ("pending" | "done" | "error", text).
+#
+# Messages are pickles, so only this user may reach the socket: it lives in a private
+# (0700) directory, $XDG_RUNTIME_DIR/vehicle-log or .whisper/ next to the app, and
+# both ends authenticate with a random key kept 0600 next to the socket.
+import os
+import sys
+import time
+import uuid
+import queue
+import argparse
+import threading
+import subprocess
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+RUN_DIR = (os.path.join(os.environ["XDG_RUNTIME_DIR"], "vehicle-log") if os.environ.get("XDG_RUNTIME_DIR")
+           else os.path.join(os.path.dirname(os.path.abspath(__file__)), ".whisper"))
+SOCKET_PATH = os.environ.get("WHISPER_SOCKET", os.path.join(RUN_DIR, "whisper.sock"))
+DEFAULT_MODEL = os.environ.get("WHISPER_MODEL", "small")   # CPU-friendly
+DEFAULT_BACKEND = os.environ.get("WHISPER_BACKEND", "whisper")
+JOB_TTL = 600   # seconds a finished result waits to be collected
+
+
+# ========================== Socket and key ==========================
+def _check_private(path, mode):
+    # refuse files or folders someone else owns or could have swapped in
+    info = os.lstat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o777 & ~mode:
+        raise PermissionError(f"{path} must belong to this user with mode {mode:o}")
+
+
+def private_dir(socket_path):
+    folder = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    if folder == RUN_DIR:
+        os.chmod(folder, 0o700)
+    _check_private(folder, 0o700 if folder == RUN_DIR else 0o777 & ~0o022)
+    return folder
+
+
+def load_authkey(socket_path):
+    # random key shared by the worker and the app, created on first use
+    private_dir(socket_path)
+    key_file = socket_path + ".key"
+    try:
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(32))
+    _check_private(key_file, 0o600)
+    with open(key_file, "rb") as f:
+        key = f.read()
+    if len(key) < 32:
+        raise PermissionError(f"{key_file} is not a valid key")
+    return key
+
+
+# ========================== Model backends ==========================
+def load_backend(model_name, backend):
+    # returns transcribe(audio) -> text
+    if backend == "int8":
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            WhisperModel = None
+        if WhisperModel is not None:
+            model = WhisperModel(model_name, device="cpu", compute_type="int8")
+
+            def transcribe(audio):
+                segments, _ = model.transcribe(audio)
+                return "".join(segment.text for segment in segments)
+            return transcribe
+
+    import openai_whisper as whisper
+
+    model = whisper.load_model(model_name, device="cpu")
+    if backend == "int8":
+        # no CTranslate2 build available: int8 dynamic quantization of the Linear layers
+        import torch
+
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def transcribe(audio):
+        return model.transcribe(audio, fp16=False)["text"]
+    return transcribe
+
+
+# ========================== Server ==========================
+class TranscriptionServer:
+    def __init__(self, model_name, backend, replicas=1):
+        self.model_name = model_name
+        self.backend = backend
+        self.ready = threading.Event()
+        self.load_error = None
+        self.jobs = queue.Queue()
+        self.results = {}          # job id -> (status, text, finished_at)
+        self.results_lock = threading.Lock()
+        # each replica is one loaded model serving jobs one at a time
+        for n in range(replicas):
+            threading.Thread(target=self._replica, name=f"whisper-{n}", daemon=True).start()
+
+    def _replica(self):
+        try:
+            transcribe = load_backend(self.model_name, self.backend)
+        except Exception as e:
+            self.load_error = f"{type(e).__name__}: {e}"
+            self.ready.set()
+            return
+        self.ready.set()
+        while True:
+            job_id, audio = self.jobs.get()
+            try:
+                result = ("done", transcribe(audio).strip())
+            except Exception as e:
+                result = ("error", f"{type(e).__name__}: {e}")
+            with self.results_lock:
+                self.results[job_id] = result + (time.time(),)
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"ready": self.ready.is_set() and not self.load_error, "error": self.load_error,
+                    "model": self.model_name, "backend": self.backend, "queued": self.jobs.qsize()}
+        if op == "submit":
+            if self.load_error:
+                return {"error": self.load_error}
+            job_id = uuid.uuid4().hex
+            with self.results_lock:
+                self.results[job_id] = ("pending", "", None)
+            self.jobs.put((job_id, request["audio"]))
+            return {"job": job_id}
+        if op == "poll":
+            with self.results_lock:
+                status, text, finished_at = self.results.get(request["job"], ("error", "unknown job", None))
+                if status != "pending":
+                    self.results.pop(request["job"], None)
+                # forget results nobody came back for
+                expired = [job for job, (_, _, t) in self.results.items() if t and time.time() - t > JOB_TTL]
+                for job in expired:
+                    del self.results[job]
+            return {"status": status, "text": text}
+        return {"error": f"unknown op {op!r}"}
+
+    def _serve_connection(self, conn):
+        with conn:
+            try:
+                while True:
+                    conn.send(self.handle(conn.recv()))
+            except (EOFError, OSError):
+                pass
+
+    def serve_forever(self, socket_path):
+        if TranscriptionClient(socket_path).status() is not None:
+            print(f"A worker is already listening on {socket_path}", flush=True)
+            return
+        authkey = load_authkey(socket_path)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)   # left behind by a worker that died
+        umask = os.umask(0o177)      # the socket is created 0600, not chmod-ed afterwards
+        try:
+            listener = Listener(socket_path, family="AF_UNIX", authkey=authkey)
+        finally:
+            os.umask(umask)
+        with listener:
+            print(f"Whisper worker ({self.model_name}, {self.backend}) listening on {socket_path}", flush=True)
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, OSError):
+                    continue   # a client without the key
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+# ========================== Client (used by the Streamlit app) ==========================
+_start_lock = threading.Lock()
+
+
+class TranscriptionClient:
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.socket_path = socket_path
+
+    def _call(self, request):
+        try:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=load_authkey(self.socket_path))
+        except AuthenticationError:
+            raise OSError(f"{self.socket_path} is not our Whisper worker (authentication failed)")
+        with conn:
+            conn.send(request)
+            return conn.recv()
+
+    def status(self):
+        # None when no worker is running
+        try:
+            return self._call({"op": "ping"})
+        except PermissionError as e:   # socket folder or key not private: never start a worker there
+            return {"ready": False, "error": str(e)}
+        except (OSError, EOFError):
+            return None
+
+    def ensure_worker(self, model_name=DEFAULT_MODEL, backend=DEFAULT_BACKEND):
+        # start a detached worker if none is listening; the model then loads inside the worker
+        with _start_lock:
+            if self.status() is not None:
+                return False
+            self._spawn(model_name, backend)
+            # wait (briefly) for the socket so sessions starting right after us find it
+            deadline = time.time() + 5
+            while time.time() < deadline and self.status() is None:
+                time.sleep(0.1)
+            return True
+
+    def _spawn(self, model_name, backend):
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--socket", self.socket_path,
+             "--model", model_name, "--backend", backend],
+            stdin=subprocess.DEVNULL, start_new_session=True,
+        )
+
+    def submit(self, audio):
+        reply = self._call({"op": "submit", "audio": audio})
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["job"]
+
+    def poll(self, job_id):
+        reply = self._call({"op": "poll", "job": job_id})
+        return reply["status"], reply["text"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm Whisper transcription worker")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=["whisper", "int8"])
+    parser.add_argument("--replicas", type=int, default=1, help="models loaded side by side")
+    args = parser.parse_args()
+    TranscriptionServer(args.model, args.backend, args.replicas).serve_forever(args.socket)